@@ -1,6 +1,9 @@
 import streamlit as st
 import pandas as pd
-from utils.data_loader import load_default, load_custom
+import os
+from utils.data_loader import load_panel, load_custom
+from utils.day_index import load_day_index
+from utils.precomputed import load_reports
 from utils.computations import (
     compute_monthly_returns,
     compute_weekday_returns,
@@ -12,44 +15,75 @@ from tabs.monthly_tab import monthly_window_tab
 from tabs.weekday_tab import weekday_intraday_tab
 from tabs.seasonality_tab import seasonality_tab
 from tabs.correlation_tab import correlation_tab
+from tabs.debug_panel import debug_panel, profiling_panel
+from utils.profiling import LOG_PATH, span, start_rerun, finish_rerun
 
 # App setup
 st.set_page_config(layout="wide")
 
+# RA_COMPACT_PANEL=1 keeps tickers int-coded and prices float32 to fit more history per worker
+COMPACT_PANEL = os.environ.get('RA_COMPACT_PANEL', '0') == '1'
+# RA_DEBUG=1 or ?debug=1 shows diagnostics in the sidebar
+DEBUG = os.environ.get('RA_DEBUG', '0') == '1' or st.query_params.get('debug') == '1'
+
 st.title("Return Analyzer: Monthly, Weekday & Seasonality")
 
 uploaded_files = st.file_uploader("Upload CSV or Excel files", type=['csv','xlsx'], accept_multiple_files=True)
 
 def load_data():
-    default_df = load_default()
-    custom_dfs = load_custom(uploaded_files) if uploaded_files else []
-    return default_df, custom_dfs
+    with span('load:panel'):
+        panel = load_panel(compact=COMPACT_PANEL)
+    with span('load:day_index'):
+        day_index = load_day_index(compact=COMPACT_PANEL)
+    with span('load:reports'):
+        reports = load_reports()
+    with span('load:uploads'):
+        custom_dfs = load_custom(uploaded_files) if uploaded_files else []
+    return panel, day_index, reports, custom_dfs
 
 
 def main():
-    default_df, custom_dfs = load_data()
+    # Spans are recorded only when someone will look at them
+    profiling = DEBUG or LOG_PATH
+    if profiling:
+        start_rerun(trace_memory=st.session_state.get('prof_mem', False), profile=st.session_state.get('prof_cpu', False))
+    with span('load'):
+        panel, day_index, reports, custom_dfs = load_data()
+    default_df = panel.frame
     d0, d1 = default_df.index.min(), default_df.index.max()
     periods = pd.date_range(d0.replace(day=1), d1.replace(day=1), freq='MS')
     labels = [d.strftime('%m/%Y') for d in periods]
 
+    # Tabs track the active view and rerun on switch, so only the open tab's body executes;
+    # the others keep their widget values (persist_state) and cached results for when they reopen
     tab1, tab2, tab3, tab4, tab5 = st.tabs([
         "Screener",
         "Monthly Window",
         "Weekday Intraday",
         "Seasonality Heatmap",
         "Correlation"
-    ])
-
-    with tab1:
-        stock_screener_tab(default_df, custom_dfs)
-    with tab2:
-        monthly_window_tab(default_df, custom_dfs)
-    with tab3:
-        weekday_intraday_tab(default_df, custom_dfs, labels, periods)
-    with tab4:
-        seasonality_tab(default_df, custom_dfs)
-    with tab5:
-        correlation_tab(default_df)
+    ], key='view', on_change='rerun')
+
+    if tab1.open:
+        with tab1, span('tab:screener'):
+            stock_screener_tab(default_df, custom_dfs, day_index, reports)
+    if tab2.open:
+        with tab2, span('tab:monthly'):
+            monthly_window_tab(panel, custom_dfs, day_index, reports)
+    if tab3.open:
+        with tab3, span('tab:weekday'):
+            weekday_intraday_tab(panel, custom_dfs, labels, periods, reports)
+    if tab4.open:
+        with tab4, span('tab:seasonality'):
+            seasonality_tab(panel, custom_dfs, reports)
+    if tab5.open:
+        with tab5, span('tab:correlation'):
+            correlation_tab(panel)
+
+    rec = finish_rerun() if profiling else None
+    if DEBUG:
+        debug_panel()
+        profiling_panel(rec)
 
 if __name__ == '__main__':
     main()
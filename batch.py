@@ -0,0 +1,65 @@
+"""
+Headless batch run: precompute the screener, monthly window, weekday and seasonality reports for
+every ticker and write them as Parquet next to a manifest. The app serves these when they match
+the current data file, so the first page load does no heavy work.
+
+    python batch.py --workers 4 --window 03/15-06/10 --monthly 2-13
+"""
+import argparse
+import calendar
+import json
+import os
+import time
+import pandas as pd
+from utils.data_loader import DEFAULT_PATH, load_panel, source_digest
+from utils.parallel import parallel_monthly, parallel_screen, parallel_seasonality, parallel_weekday
+from utils.precomputed import MANIFEST, PRECOMPUTED_DIR, write_report
+
+def parse_window(text):
+    start, end = text.split('-')
+    sm, sd = (int(x) for x in start.split('/'))
+    em, ed = (int(x) for x in end.split('/'))
+    return (sm, sd), (em, ed)
+
+def month_windows():
+    """Each calendar month as a whole-month screener window."""
+    return [((m, 1), (m, calendar.monthrange(2000, m)[1])) for m in range(1, 13)]
+
+def run(data=DEFAULT_PATH, out=PRECOMPUTED_DIR, windows=(), monthly=((2, 13),), workers=None, log=print):
+    panel = load_panel(data)
+    os.makedirs(out, exist_ok=True)
+    manifest = {'data': data, 'digest': source_digest(data), 'created': pd.Timestamp.now().isoformat(), 'reports': {}}
+    d0, d1 = panel.frame.index.min(), panel.frame.index.max()
+
+    def step(name, fn):
+        t0 = time.perf_counter()
+        fn()
+        log(f"{name:<32} {time.perf_counter() - t0:7.2f}s")
+
+    for win in list(windows) or month_windows():
+        step(f"screener {win}", lambda: write_report(out, 'screener', win, parallel_screen(panel, *win, workers=workers), manifest))
+    for sd, ed in monthly:
+        step(f"monthly {sd}-{ed}", lambda: write_report(out, 'monthly', (sd, ed), parallel_monthly(panel, sd, ed, workers), manifest))
+    step("weekday", lambda: write_report(out, 'weekday', None, parallel_weekday(panel, d0.replace(day=1), d1.replace(day=1), workers), manifest))
+    step("seasonality", lambda: write_report(out, 'seasonality', None, parallel_seasonality(panel, workers), manifest))
+
+    # Manifest last: a half-written run is never picked up by the app
+    with open(os.path.join(out, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--data', default=DEFAULT_PATH)
+    ap.add_argument('--out', default=PRECOMPUTED_DIR)
+    ap.add_argument('--workers', type=int, default=None, help="process count (default RA_WORKERS or all cores)")
+    ap.add_argument('--window', action='append', type=parse_window, default=[], metavar='MM/DD-MM/DD',
+                    help="screener window, repeatable (default: each calendar month)")
+    ap.add_argument('--monthly', action='append', default=[], metavar='START-END',
+                    help="monthly window start/end days, repeatable (default: 2-13)")
+    args = ap.parse_args()
+    monthly = [tuple(int(x) for x in m.split('-')) for m in args.monthly] or [(2, 13)]
+    run(args.data, args.out, args.window, monthly, args.workers)
+
+if __name__ == '__main__':
+    main()
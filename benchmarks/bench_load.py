@@ -0,0 +1,46 @@
+"""
+Cold-start cost of load_default: CSV parse vs the Arrow columnar cache.
+Each measurement runs in a fresh interpreter so nothing is warm in-process.
+
+    python -m benchmarks.bench_load --tickers 500 --years 10
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+from benchmarks.synthetic import synthetic_prices
+from utils.data_loader import cache_path
+
+CHILD = '''
+import resource, sys, time
+from utils.data_loader import load_default
+t0 = time.perf_counter()
+df = load_default(sys.argv[1])
+print(time.perf_counter() - t0, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, len(df))
+'''
+
+def cold_load(path):
+    out = subprocess.run([sys.executable, '-c', CHILD, path], capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    secs, rss_kb, rows = out.stdout.split()
+    return float(secs), int(rss_kb) / 1024, int(rows)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--tickers', type=int, default=500)
+    ap.add_argument('--years', type=int, default=10)
+    args = ap.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'all_stocks.csv')
+        synthetic_prices(args.tickers, args.years).to_csv(path, index=False)
+        print(f"CSV: {os.path.getsize(path) / 1e6:.1f} MB")
+        csv = cold_load(path)          # parses the CSV and writes the cache
+        cached = cold_load(path)       # served from the cache
+        os.remove(cache_path(path))
+        print(f"{'mode':<8} {'rows':>10} {'seconds':>9} {'peak RSS (MB)':>14}")
+        for name, (secs, rss, rows) in [('csv', csv), ('arrow', cached)]:
+            print(f"{name:<8} {rows:>10} {secs:>9.2f} {rss:>14.0f}")
+
+if __name__ == '__main__':
+    main()
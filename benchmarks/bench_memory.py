@@ -0,0 +1,54 @@
+"""
+Resident memory of one session's rerun: legacy str/float64 frame with the copies the tabs used
+to make, vs the shared compact PricePanel with per-ticker views.
+
+    python -m benchmarks.bench_memory --tickers 500 --years 10
+"""
+import argparse
+import gc
+import pickle
+import tracemalloc
+from benchmarks.synthetic import synthetic_prices, as_loaded
+from utils.panel import PricePanel
+
+def legacy_rerun(blob):
+    df = as_loaded(pickle.loads(blob))
+    df['stock'] = df['stock'].astype(object)
+    cached = pickle.dumps(df)                  # st.cache_data keeps the pickled frame...
+    default_df = pickle.loads(cached)          # ...and hands each rerun a fresh copy
+    held = [cached, default_df, default_df.copy(), default_df.copy()]   # screener + correlation copies
+    stk = default_df['stock'].iloc[0]
+    for _ in range(3):                         # monthly / weekday / seasonality selections
+        held.append(default_df[default_df['stock'] == stk].drop(columns=['stock']))
+    return held
+
+def compact_rerun(blob):
+    panel = PricePanel.from_frame(as_loaded(pickle.loads(blob)), compact=True)   # cache_resource: one shared object
+    stk = panel.tickers[0]
+    return [panel] + [panel.view(stk) for _ in range(3)]
+
+def measure(fn, blob):
+    gc.collect()
+    tracemalloc.start()
+    held = fn(blob)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    return current / 1e6
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--tickers', type=int, default=500)
+    ap.add_argument('--years', type=int, default=10)
+    args = ap.parse_args()
+    raw = synthetic_prices(args.tickers, args.years)
+    blob = pickle.dumps(raw)                   # stands in for reading the file from disk
+    legacy = measure(legacy_rerun, blob)
+    compact = measure(compact_rerun, blob)
+    print(f"rows: {len(raw)}")
+    print(f"legacy  retained: {legacy:8.1f} MB")
+    print(f"compact retained: {compact:8.1f} MB  ({legacy / compact:.1f}x smaller)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+"""
+Speedup of the sharded process pool against worker count on a synthetic universe.
+
+    python -m benchmarks.bench_parallel --tickers 5000 --years 5
+"""
+import argparse
+import os
+import time
+from benchmarks.synthetic import synthetic_prices, as_loaded
+from utils.panel import PricePanel
+from utils.parallel import parallel_screen, parallel_monthly, parallel_seasonality
+
+TASKS = {
+    'screener': lambda p, w: parallel_screen(p, (3, 15), (6, 10), workers=w),
+    'monthly': lambda p, w: parallel_monthly(p, 2, 13, workers=w),
+    'seasonality': lambda p, w: parallel_seasonality(p, workers=w),
+}
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--tickers', type=int, default=5000)
+    ap.add_argument('--years', type=int, default=5)
+    ap.add_argument('--workers', type=int, nargs='+', default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    ap.add_argument('--tasks', nargs='+', default=list(TASKS), choices=list(TASKS))
+    args = ap.parse_args()
+    panel = PricePanel.from_frame(as_loaded(synthetic_prices(args.tickers, args.years)), compact=True)
+    print(f"{args.tickers} tickers, {len(panel)} rows, {os.cpu_count()} cores")
+    print(f"{'task':<12} {'workers':>7} {'seconds':>9} {'speedup':>8}")
+    for name in args.tasks:
+        base = None
+        for w in args.workers:
+            t0 = time.perf_counter()
+            TASKS[name](panel, w)
+            secs = time.perf_counter() - t0
+            base = base or secs
+            print(f"{name:<12} {w:>7} {secs:>9.2f} {base / secs:>7.2f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""
+Screener scaling: per-ticker compute_period_returns loop vs utils.screener.screen_universe.
+
+    python -m benchmarks.bench_screener --tickers 10 100 1000 --years 10
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from benchmarks.synthetic import synthetic_prices, as_loaded
+from tabs.screener_tab import compute_period_returns
+from utils.screener import screen_universe
+
+def loop_screener(df, sd_md, ed_md):
+    results = []
+    for stk in sorted(df['stock'].unique()):
+        df_stk = df[df['stock'] == stk].reset_index()
+        pr = compute_period_returns(df_stk, sd_md, ed_md, 'date', 'close')
+        if not pr.empty:
+            results.append((stk, pr['return'].mean(), (pr['return'] > 0).mean() * 100, (pr['return'] < 0).mean() * 100))
+    return pd.DataFrame(results, columns=['Ticker', 'Avg Return (%)', 'Positive Ratio (%)', 'Negative Ratio (%)'])
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t0
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--tickers', type=int, nargs='+', default=[10, 100, 500])
+    ap.add_argument('--years', type=int, default=10)
+    ap.add_argument('--skip-loop-above', type=int, default=1000, help="skip the slow loop for larger universes")
+    args = ap.parse_args()
+    sd_md, ed_md = (3, 15), (6, 10)
+    print(f"{'tickers':>8} {'rows':>10} {'loop (s)':>10} {'vectorized (s)':>15} {'speedup':>8}")
+    for n in args.tickers:
+        df = as_loaded(synthetic_prices(n, args.years))
+        vec, t_vec = timed(screen_universe.__wrapped__, df, sd_md, ed_md)
+        if n <= args.skip_loop_above:
+            ref, t_loop = timed(loop_screener, df, sd_md, ed_md)
+            assert np.allclose(ref.iloc[:, 1:].to_numpy(), vec.iloc[:, 1:].to_numpy())
+            print(f"{n:>8} {len(df):>10} {t_loop:>10.3f} {t_vec:>15.3f} {t_loop / t_vec:>7.1f}x")
+        else:
+            print(f"{n:>8} {len(df):>10} {'-':>10} {t_vec:>15.3f} {'-':>8}")
+
+if __name__ == '__main__':
+    main()
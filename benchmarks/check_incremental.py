@@ -0,0 +1,93 @@
+"""
+Correctness check for incremental refresh: appends trading days (and newly listed tickers) to a
+price store one version at a time, advances the live panel and its derived state, and compares
+each against a full rebuild from the same data. Exits 1 on any mismatch.
+
+    python -m benchmarks.check_incremental --tickers 50 --years 5 --days 5 --gaps holidays
+"""
+import argparse
+import copy
+import os
+import sys
+import tempfile
+import numpy as np
+import pandas as pd
+from benchmarks.synthetic import GAP_PATTERNS, synthetic_prices
+from utils.backtester import _backtest, window_plan
+from utils.correlation import CorrelationEngine
+from utils.day_index import DayIndex
+from utils.price_store import LiveStore, PriceStore, normalize_bars
+from utils.seasonality import SeasonalityCube
+
+WINDOWS = [((1, 1), (12, 31)), ((3, 15), (6, 10)), ((11, 20), (2, 10))]
+
+def derive(live):
+    index = live.derived('day_index', lambda p: DayIndex.build(p.frame), lambda i, b, p: i.append(b))
+    cube = live.derived('seasonality', lambda p: SeasonalityCube.build(p.frame), lambda c, b, p: c.append(b))
+    engine = live.derived('correlation', lambda p: CorrelationEngine.from_frame(p.frame),
+                          lambda e, b, p: copy.deepcopy(e).append(b))
+    return index, cube, engine
+
+def checks(live, index, cube, engine):
+    """(name, passed) pairs comparing incremental state with a full rebuild of the store's bars."""
+    frame = live.store.read()
+    ref_index, ref_cube = DayIndex.build(frame), SeasonalityCube.build(frame)
+    ref_engine = CorrelationEngine.from_frame(frame)
+    out = [
+        ('panel', live.panel.frame.equals(frame)),
+        ('day_index layout', index.tickers == ref_index.tickers and all(
+            np.array_equal(getattr(index, a), getattr(ref_index, a), equal_nan=a == 'close')
+            for a in ('years', 'close', 'month', 'dates', 'first_idx', 'last_idx'))),
+        ('seasonality', cube.tickers == ref_cube.tickers and np.array_equal(cube.returns, ref_cube.returns, equal_nan=True)),
+    ]
+    for win in WINDOWS:
+        bt, ref = _backtest.__wrapped__(index, window_plan(win), 0.0), _backtest.__wrapped__(ref_index, window_plan(win), 0.0)
+        same = all(a.equals(b) for a, b in zip((bt.trades(), bt.summary(), bt.portfolio()), (ref.trades(), ref.summary(), ref.portfolio())))
+        out.append((f'backtest {win}', same))
+    corr = engine.corr.loc[ref_engine.corr.index, ref_engine.corr.columns].to_numpy()
+    out.append(('correlation', np.allclose(corr, ref_engine.corr.to_numpy(), atol=1e-8, equal_nan=True)))
+    # rolling() state is kept by engine.append from the first call on
+    cols = [engine.tickers.index(t) for t in ref_engine.tickers]
+    rolled = engine.rolling(60).corr()[np.ix_(cols, cols)]
+    out.append(('rolling correlation', np.allclose(rolled, ref_engine.rolling(60).corr(), atol=1e-8, equal_nan=True)))
+    return out
+
+def run(tickers, years, days, gaps, seed=0, log=print):
+    full = normalize_bars(synthetic_prices(tickers, years, seed=seed, **GAP_PATTERNS[gaps]))
+    dates = np.sort(full.index.unique())
+    cut = dates[-days]
+    # Two tickers still trading at the end list mid-way through the appended days
+    late = set(sorted(full.loc[full.index == dates[-1], 'stock'].unique())[-2:])
+    listed = dates[-max(days // 2, 1)]
+    failed = []
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PriceStore(os.path.join(tmp, 'prices.sqlite'))
+        store.append(full[(full.index < cut) & ~full['stock'].isin(late)], source='history')
+        live = LiveStore(store.path)
+        live.refresh()
+        derive(live)
+        for day in dates[-days:]:
+            bars = full[(full.index == day) & ~full['stock'].isin(late)]
+            if day == listed:
+                bars = pd.concat([bars, full[(full.index <= day) & full['stock'].isin(late)]])
+            version = store.append(bars, source=str(day)[:10])
+            live.refresh()
+            for name, ok in checks(live, *derive(live)):
+                log(f"v{version} {name:<40} {'ok' if ok else 'MISMATCH'}")
+                if not ok:
+                    failed.append((version, name))
+    return failed
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--tickers', type=int, default=50)
+    ap.add_argument('--years', type=int, default=5)
+    ap.add_argument('--days', type=int, default=5)
+    ap.add_argument('--gaps', choices=list(GAP_PATTERNS), default='holidays')
+    ap.add_argument('--seed', type=int, default=0)
+    args = ap.parse_args()
+    failed = run(args.tickers, args.years, args.days, args.gaps, args.seed)
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+"""
+Timed, memory-tracked benchmarks of the hot paths on synthetic data, written as JSON so runs
+from two commits can be compared. Cached entry points are called through __wrapped__, so every
+repeat does the full work.
+
+    python -m benchmarks.suite --tickers 200 --years 10 --gaps all --out bench.json
+    python -m benchmarks.suite --compare base.json bench.json --threshold 1.10
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from benchmarks.synthetic import GAP_PATTERNS, synthetic_prices
+from utils.data_loader import _load_default, cache_path, file_fingerprint
+from utils.computations import (
+    compute_monthly_returns,
+    compute_weekday_returns,
+    compute_seasonality_heatmap,
+    compute_correlation
+)
+from utils.day_index import DayIndex
+from utils.panel import PricePanel
+from utils.screener import screen_universe
+
+def cases(path):
+    """(name, fn) pairs; fn() runs one repetition. Data is loaded once, outside the timings."""
+    load = _load_default.__wrapped__
+    df = load(path, file_fingerprint(path))
+    panel = PricePanel.from_frame(df)
+    view = panel.view(panel.tickers[0])
+    p0, p1 = df.index.min(), df.index.max()
+    index = DayIndex.build(df)
+
+    def csv_load():
+        if os.path.exists(cache_path(path)):
+            os.remove(cache_path(path))
+        return load(path, file_fingerprint(path))
+
+    return [
+        ('load_default[csv]', csv_load),
+        ('load_default[arrow]', lambda: load(path, file_fingerprint(path))),
+        ('compute_monthly_returns[ticker]', lambda: compute_monthly_returns.__wrapped__(view, 2, 13)),
+        ('compute_monthly_returns[universe]', lambda: compute_monthly_returns.__wrapped__(df, 2, 13)),
+        ('compute_weekday_returns[ticker]', lambda: compute_weekday_returns.__wrapped__(view, p0, p1)),
+        ('compute_seasonality_heatmap[ticker]', lambda: compute_seasonality_heatmap.__wrapped__(view)),
+        ('compute_correlation[universe]', lambda: compute_correlation.__wrapped__(df)),
+        ('screener[screen_universe]', lambda: screen_universe.__wrapped__(df, (3, 15), (6, 10))),
+        ('screener[day_index_build]', lambda: DayIndex.build(df)),
+        ('screener[day_index_screen]', lambda: index.screen((3, 15), (6, 10))),
+    ]
+
+def measure(fn, repeat):
+    """Wall-clock seconds of each repeat, then Python-heap peak (MB) of one traced run."""
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'seconds_min': min(times),
+        'seconds_median': statistics.median(times),
+        'repeat': repeat,
+        'peak_mb': peak / 2**20,
+    }
+
+def git_commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+                             cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(tickers, years, gaps, repeat, only=None, seed=0, log=print):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'all_stocks.csv')
+        raw = synthetic_prices(tickers, years, seed=seed, **GAP_PATTERNS[gaps])
+        raw.to_csv(path, index=False)
+        results = {}
+        for name, fn in cases(path):
+            if only and not any(o in name for o in only):
+                continue
+            results[name] = measure(fn, repeat)
+            log(f"{name:<38} {results[name]['seconds_min']:>9.4f}s {results[name]['peak_mb']:>9.1f} MB")
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'machine': platform.machine(),
+            'tickers': tickers, 'years': years, 'gaps': gaps, 'seed': seed,
+            'rows': len(raw), 'repeat': repeat,
+        },
+        'results': results,
+    }
+
+def compare(base, new, threshold=1.10):
+    """Print per-benchmark time/memory ratios (new / base); return names slower than threshold."""
+    b, n = base['results'], new['results']
+    print(f"base {base['meta'].get('commit')} vs new {new['meta'].get('commit')}")
+    print(f"{'benchmark':<38} {'base (s)':>9} {'new (s)':>9} {'ratio':>7} {'mem ratio':>10}")
+    slower = []
+    for name in sorted(b.keys() & n.keys()):
+        ratio = n[name]['seconds_min'] / b[name]['seconds_min'] if b[name]['seconds_min'] else float('inf')
+        mem = n[name]['peak_mb'] / b[name]['peak_mb'] if b[name]['peak_mb'] else float('inf')
+        flag = '  <- slower' if ratio > threshold else ''
+        print(f"{name:<38} {b[name]['seconds_min']:>9.4f} {n[name]['seconds_min']:>9.4f} {ratio:>6.2f}x {mem:>9.2f}x{flag}")
+        if ratio > threshold:
+            slower.append(name)
+    for name in sorted(b.keys() ^ n.keys()):
+        print(f"{name:<38} only in {'base' if name in b else 'new'}")
+    return slower
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--tickers', type=int, default=200)
+    ap.add_argument('--years', type=int, default=10)
+    ap.add_argument('--gaps', choices=list(GAP_PATTERNS), default='none')
+    ap.add_argument('--repeat', type=int, default=3)
+    ap.add_argument('--seed', type=int, default=0)
+    ap.add_argument('--only', nargs='*', help="run benchmarks whose name contains any of these")
+    ap.add_argument('--out', help="write JSON here (default: stdout)")
+    ap.add_argument('--compare', nargs=2, metavar=('BASE', 'NEW'), help="compare two result files instead of running")
+    ap.add_argument('--threshold', type=float, default=1.10, help="time ratio counted as a regression")
+    args = ap.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as f, open(args.compare[1]) as g:
+            slower = compare(json.load(f), json.load(g), args.threshold)
+        sys.exit(1 if slower else 0)
+
+    report = run(args.tickers, args.years, args.gaps, args.repeat, args.only, args.seed,
+                 log=lambda msg: print(msg, file=sys.stderr))
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+if __name__ == '__main__':
+    main()
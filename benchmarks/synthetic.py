@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+# Named gap patterns for the benchmark CLIs: keyword arguments to synthetic_prices
+GAP_PATTERNS = {
+    'none': {},
+    'holidays': {'holidays': True},
+    'listings': {'listings': True},
+    'sparse': {'missing': 0.02},
+    'all': {'holidays': True, 'listings': True, 'missing': 0.02},
+}
+
+def market_holidays(dates, rng):
+    """Jan 1, Dec 25 and a few random closures a year, shared by every ticker."""
+    fixed = ((dates.month == 1) & (dates.day == 1)) | ((dates.month == 12) & (dates.day == 25))
+    return fixed | (rng.random(len(dates)) < 3 / 261)
+
+def synthetic_prices(n_tickers=100, years=10, start='2010-01-01', seed=0, holidays=False, listings=False, missing=0.0):
+    """
+    Deterministic random-walk OHLC panel in the all_stocks.csv schema.
+    holidays drops market-wide closure days, listings gives each ticker a random listing and
+    delisting date inside the range, and missing drops that fraction of each ticker's rows.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(start, periods=years * 261)
+    if holidays:
+        dates = dates[~market_holidays(dates, np.random.default_rng(seed + 1))]
+    n = len(dates)
+    gaps = np.random.default_rng(seed + 2)
+    frames = []
+    for i in range(n_tickers):
+        close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, n)))
+        open_ = close * (1 + rng.normal(0, 0.005, n))
+        keep = np.ones(n, dtype=bool)
+        if listings:
+            lo, hi = np.sort(gaps.integers(0, n, 2))
+            keep[:lo // 2] = keep[n - (n - hi) // 2:] = False   # at least half the range stays listed
+        if missing:
+            keep &= gaps.random(n) >= missing
+        frames.append(pd.DataFrame({
+            'date': dates,
+            'stock': f"TCK{i:05d}",
+            'open': open_,
+            'high': np.maximum(open_, close) * 1.01,
+            'low': np.minimum(open_, close) * 0.99,
+            'close': close,
+            'volume': rng.integers(1_000, 1_000_000, n),
+        })[keep])
+    return pd.concat(frames, ignore_index=True)
+
+def as_loaded(raw):
+    """Mimic load_default's output: sorted by stock/date, date index."""
+    df = raw.sort_values(['stock', 'date'])
+    return df.set_index('date')
@@ -1,6 +1,10 @@
 import streamlit as st
 import plotly.graph_objects as go
 import pandas as pd
+from utils.correlation import panel_correlation, window_top_pairs
+from utils.result_cache import register_dataset
+from utils.jobs import job_manager, job_result
+from utils.rendering import DETAIL_MAX, cached_figure, corr_blocks, downsample, plot
 
 # Wrap tabs in your main app to preserve state across reruns:
 # if 'active_tab' not in st.session_state:
@@ -12,79 +16,85 @@ import pandas as pd
 #     else:
 #         other_tab(df)
 
-def correlation_tab(default_df):
-    """Render the Correlation and Returns comparison tab with interactive features."""
-    # Copy and strip column names
-    df = default_df.copy()
-    df.columns = df.columns.str.strip()
-
-    # Lowercase mapping
-    cols_lower = {col.lower(): col for col in df.columns}
-
-    # Identify ticker, date, and price columns
-    ticker_col = cols_lower.get('stock') or cols_lower.get('symbol')
-    date_col = cols_lower.get('date')
-    if date_col is None and isinstance(df.index, pd.DatetimeIndex):
-        df = df.reset_index()
-        date_col = df.columns[0]
-    price_col = next((cols_lower[opt] for opt in ['close', 'adj_close', 'adjusted_close', 'close_price', 'price'] if opt in cols_lower), None)
-
-    # Validate
-    if not (ticker_col and date_col and price_col):
-        missing = []
-        if not ticker_col: missing.append("'stock' or 'symbol'")
-        if not date_col: missing.append("'date' or DatetimeIndex'")
-        if not price_col: missing.append("price-like column")
-        st.error(f"Missing required column(s): {', '.join(missing)}.")
-        return
-
-    # Ensure date dtype
-    df[date_col] = pd.to_datetime(df[date_col], errors='coerce')
-    df = df.dropna(subset=[date_col])
-
-    # Prepare tickers list
-    tickers = sorted(df[ticker_col].unique())
-
-    # Compute returns
-    df = df.sort_values([ticker_col, date_col])
-    df['return'] = df.groupby(ticker_col)[price_col].pct_change()
-
-    # Pivot returns matrix
-    returns = df.pivot(index=date_col, columns=ticker_col, values='return')
-    returns = returns.reindex(columns=tickers)
-
-    # Compute correlation in percent
-    corr = returns.corr() * 100
-    corr = corr.reindex(index=tickers, columns=tickers)
-
-    # Heatmap setup
-    st.markdown("### Correlation Heatmap: Default Stocks")
-    heatmap = go.Heatmap(
-        z=corr.values,
-        x=tickers,
-        y=tickers,
+def _heatmap(mat, hover="%{x} vs %{y}: %{z:.1f}%"):
+    """Correlation (%) heatmap of a labelled matrix, sized to its row count."""
+    fig = go.Figure(go.Heatmap(
+        z=mat.values,
+        x=list(mat.columns),
+        y=list(mat.index),
         colorscale='RdBu_r',
         zmid=0,
         zmin=-100,
         zmax=100,
-        hovertemplate="%{x} vs %{y}: %{z:.1f}%<extra></extra>",
+        hovertemplate=hover + "<extra></extra>",
         colorbar=dict(lenmode='fraction', len=0.75, y=0.5, yanchor='middle')
-    )
-    fig = go.Figure(data=heatmap)
+    ))
     fig.update_layout(
         xaxis=dict(tickangle=-45, tickfont=dict(size=12), constrain='domain'),
         yaxis=dict(autorange='reversed', tickfont=dict(size=12), scaleanchor='x'),
         margin=dict(l=0, r=0, t=0, b=0),
-        width=1600, height=1200,
+        height=min(1200, 300 + 18 * len(mat)),
         plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', font_color='var(--fg)'
     )
-    st.plotly_chart(fig, use_container_width=False, config={'displayModeBar': False})
+    return fig
+
+def correlation_view(panel, price_col, start, end, d0, d1, progress=None):
+    """Engine plus clustered blocks of its matrix for a date range; runs off the script thread."""
+    engine = panel_correlation(panel, price_col, None if start == d0 else start, None if end == d1 else end, progress)
+    register_dataset(engine.corr, ('corr', panel.fingerprint, price_col, start, end))  # skip content-hashing N x N cells
+    register_dataset(engine, ('corr_engine', panel.fingerprint, price_col, start, end))
+    if progress:
+        progress(0.8, "Clustering")
+    return engine, corr_blocks(engine.corr)
+
+def correlation_tab(panel):
+    """Render the Correlation and Returns comparison tab with interactive features."""
+    df = panel.frame
+    cols_lower = {col.strip().lower(): col for col in df.columns}
+
+    # Identify price column
+    price_col = next((cols_lower[opt] for opt in ['close', 'adj_close', 'adjusted_close', 'close_price', 'price'] if opt in cols_lower), None)
+    if not price_col:
+        st.error("Missing required column(s): price-like column.")
+        return
+
+    # Date range
+    d0, d1 = df.index.min().date(), df.index.max().date()
+    c1, c2, _, _ = st.columns(4)
+    start = c1.date_input("From", d0, min_value=d0, max_value=d1, key='cor_from', persist_state='session')
+    end = c2.date_input("To", d1, min_value=d0, max_value=d1, key='cor_to', persist_state='session')
+    if start > end:
+        st.warning("From date must be on or before To date.")
+        return
+    # Engine and clustering run as a background job, kept per (universe, price column, range)
+    base = (panel.fingerprint, price_col, start, end)
+    job = job_manager().submit(('correlation',) + base, correlation_view, panel, price_col, start, end, d0, d1)
+    view = job_result(job, "Computing correlations")
+    if view is None:
+        return
+    engine, (ordered, labels, bounds, means) = view
+    tickers, returns, corr = engine.tickers, engine.returns, engine.corr
+
+    # Heatmap in clustered order; large universes get a block overview to drill into
+    st.markdown("### Correlation Heatmap: Default Stocks")
+    if len(tickers) <= DETAIL_MAX:
+        fig = cached_figure('corr_heatmap', base, lambda: _heatmap(ordered))
+    else:
+        st.caption(f"*{len(tickers)} tickers in {len(labels)} blocks of similar stocks; cells show the average correlation between blocks.*")
+        fig = cached_figure('corr_overview', base, lambda: _heatmap(means, "%{y}<br>vs %{x}: %{z:.1f}% avg"))
+    plot(fig, 'corr_heatmap', use_container_width=True, config={'displayModeBar': False})
+    if len(tickers) > DETAIL_MAX:
+        c1, c2 = st.columns(2)
+        row = c1.selectbox("Row block", labels, key='cor_blk_row', persist_state='session')
+        col = c2.selectbox("Column block", labels, index=labels.index(row), key='cor_blk_col', persist_state='session')
+        (r0, r1), (k0, k1) = bounds[labels.index(row)], bounds[labels.index(col)]
+        fig = cached_figure('corr_block', (base, r0, k0), lambda: _heatmap(ordered.iloc[r0:r1, k0:k1]))
+        plot(fig, 'corr_block', use_container_width=True, config={'displayModeBar': False})
     st.caption("*Correlation values are percentage points from -100% to 100%.*")
     st.markdown("---")
 
-    # Top correlated pairs
-    pairs = [(s1, s2, corr.loc[s1, s2]) for i, s1 in enumerate(tickers) for j, s2 in enumerate(tickers) if j > i]
-    top10 = sorted(pairs, key=lambda x: x[2], reverse=True)[:10]
+    # Top correlated pairs (partial sort of the upper triangle)
+    top10 = engine.top_pairs(10)
 
     st.markdown("### Top 10 Correlated Pairs")
     # Table header including Sr.No and Action
@@ -112,24 +122,65 @@ def correlation_tab(default_df):
     # Returns comparison
     if st.session_state.get('_show_chart', False):
         st.markdown("### Compare Returns of Selected Stocks")
-        default_sel = st.session_state.get('selection', tickers[:2])
-        selection = st.multiselect("Select 2 or 3 Tickers to Compare", tickers, default=default_sel, max_selections=3, key='cor_sel')
+        # The From/To range may drop tickers picked earlier; keep only those still in it
+        default_sel = [t for t in st.session_state.get('selection', []) if t in tickers]
+        default_sel = default_sel if len(default_sel) >= 2 else tickers[:2]
+        if any(t not in tickers for t in st.session_state.get('cor_sel', [])):
+            del st.session_state['cor_sel']
+        selection = st.multiselect("Select 2 or 3 Tickers to Compare", tickers, default=default_sel, max_selections=3, key='cor_sel', persist_state='session')
         if len(selection) >= 2:
-            sel_returns = returns[selection]
-            cum_returns = sel_returns.cumsum() * 100
-            fig2 = go.Figure()
-            for t in selection:
-                fig2.add_trace(go.Scatter(x=cum_returns.index, y=cum_returns[t], mode='lines', name=t))
-            # Unified hover tooltip
-            fig2.update_layout(
-                title="Cumulative Returns (%)",
-                xaxis_title="Date", yaxis_title="Cumulative Return (%)",
-                hovermode='x unified',
-                margin=dict(l=20, r=20, t=30, b=20), height=400,
-                plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', font_color='var(--fg)'
-            )
-            st.plotly_chart(fig2, use_container_width=True)
+            def build():
+                cum_returns = returns[selection].cumsum() * 100
+                fig2 = go.Figure()
+                for t in selection:
+                    s = downsample(cum_returns[t])
+                    fig2.add_trace(go.Scattergl(x=s.index, y=s.values, mode='lines', name=t))
+                # Unified hover tooltip
+                fig2.update_layout(
+                    title="Cumulative Returns (%)",
+                    xaxis_title="Date", yaxis_title="Cumulative Return (%)",
+                    hovermode='x unified',
+                    margin=dict(l=20, r=20, t=30, b=20), height=400,
+                    plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', font_color='var(--fg)'
+                )
+                return fig2
+            plot(cached_figure('cum_returns', (base, tuple(selection)), build), 'cum_returns', use_container_width=True)
         else:
             st.info("Please select at least 2 tickers to compare.")
     else:
         st.empty()
+
+    # Rolling correlation (sliding sums; no per-window corr())
+    st.markdown("---")
+    st.markdown("### Rolling Correlation")
+    if len(tickers) < 2 or returns.empty:
+        st.info("Need at least 2 tickers for rolling correlation.")
+        return
+    pair = [t for t in st.session_state.get('selection', []) if t in tickers][:2]
+    pair = pair if len(pair) == 2 else tickers[:2]
+    c1, c2, c3, c4 = st.columns(4)
+    window = c1.selectbox("Window (trading days)", [60, 120, 252], key='roll_win', persist_state='session')
+    s1 = c2.selectbox("Stock 1", tickers, index=tickers.index(pair[0]), key='roll_s1', persist_state='session')
+    s2 = c3.selectbox("Stock 2", tickers, index=tickers.index(pair[1]), key='roll_s2', persist_state='session')
+    r0, r1 = returns.index.min().date(), returns.index.max().date()
+    as_of = c4.date_input("Matrix as of", r1, min_value=r0, max_value=r1, key='roll_at', persist_state='session')
+
+    def build():
+        roll = downsample(engine.rolling_pair(s1, s2, window, min_periods=window // 2))
+        fig3 = go.Figure(go.Scattergl(x=roll.index, y=roll.values, mode='lines', name=roll.name))
+        fig3.add_hline(y=corr.loc[s1, s2], line_dash='dot', annotation_text="Full period")
+        fig3.update_layout(
+            title=f"{window}-day Rolling Correlation (%): {s1} vs {s2}",
+            xaxis_title="Date", yaxis_title="Correlation (%)", yaxis_range=[-100, 100],
+            margin=dict(l=20, r=20, t=30, b=20), height=400,
+            plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', font_color='var(--fg)'
+        )
+        return fig3
+    plot(cached_figure('rolling_corr', (base, s1, s2, window), build), 'rolling_corr', use_container_width=True)
+
+    st.markdown(f"#### Top 10 Pairs over the {window} days to {as_of:%d/%m/%Y}")
+    window_pairs = window_top_pairs(engine, as_of, window, 10)
+    st.dataframe(
+        pd.DataFrame(window_pairs, columns=['Stock 1', 'Stock 2', 'Corr %']).round(1),
+        use_container_width=True
+    )
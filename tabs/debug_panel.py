@@ -0,0 +1,51 @@
+import streamlit as st
+import pandas as pd
+from utils.result_cache import RESULTS
+from utils.rendering import FIGURES, payload_stats
+
+def debug_panel():
+    """Sidebar diagnostics: result cache size and hit/miss/eviction counters, chart payload sizes."""
+    with st.sidebar.expander("Debug: result cache", expanded=False):
+        stats = RESULTS.stats
+        lookups = stats['hits'] + stats['disk_hits'] + stats['misses']
+        c1, c2 = st.columns(2)
+        c1.metric("Entries", len(RESULTS))
+        c2.metric("Memory", f"{RESULTS.bytes / 2**20:.1f} / {RESULTS.max_bytes / 2**20:.0f} MB")
+        c1.metric("Hit rate", f"{(stats['hits'] + stats['disk_hits']) / lookups * 100:.0f}%" if lookups else "-")
+        c2.metric("Disk tier", RESULTS.disk_dir or "off")
+        st.dataframe(pd.DataFrame([stats]).T.rename(columns={0: 'count'}), use_container_width=True)
+        if st.button("Clear memory tier", key='dbg_clear_cache'):
+            RESULTS.clear()
+    with st.sidebar.expander("Debug: chart payloads", expanded=False):
+        c1, c2 = st.columns(2)
+        c1.metric("Cached figures", len(FIGURES))
+        c2.metric("Figure cache", f"{FIGURES.bytes / 2**20:.1f} MB")
+        st.dataframe(payload_stats(), use_container_width=True, hide_index=True)
+        st.caption("Serialized size of the last figure built per chart.")
+
+def profiling_panel(rec, keep=5):
+    """Sidebar per-rerun span breakdown of the last few reruns, with cProfile export."""
+    history = st.session_state.setdefault('_profiles', [])
+    if rec is not None:
+        history.append(rec)
+        del history[:-keep]
+    with st.sidebar.expander("Debug: rerun profile", expanded=False):
+        c1, c2 = st.columns(2)
+        c1.checkbox("Trace allocations", key='prof_mem', help="tracemalloc per span; slows reruns")
+        c2.checkbox("cProfile reruns", key='prof_cpu')
+        if not history:
+            st.caption("No rerun recorded yet.")
+            return
+        labels = [f"{i + 1}. {r.label} ({r.seconds * 1e3:.0f} ms)" for i, r in enumerate(history)]
+        pick = st.selectbox("Rerun", labels, index=len(labels) - 1)  # no key: new options select the latest
+        chosen = history[labels.index(pick)]
+        table = chosen.table()
+        top = table[table['Depth'] == 0]
+        c1.metric("Rerun", f"{chosen.seconds * 1e3:.0f} ms")
+        c2.metric("Cache hits", f"{int(top['Hits'].sum())} / {int(top['Hits'].sum() + top['Misses'].sum())}")
+        cols = table.columns if chosen.trace_memory else [c for c in table.columns if 'MB' not in c]
+        st.dataframe(table[[c for c in cols if c != 'Depth']], use_container_width=True, hide_index=True)
+        if chosen.prof_bytes:
+            st.download_button("Download .prof", chosen.prof_bytes, file_name=f"rerun-{labels.index(pick) + 1}.prof",
+                               mime='application/octet-stream', key='prof_dl',
+                               help="cProfile stats: open with snakeviz or python -m pstats")
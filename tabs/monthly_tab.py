@@ -2,22 +2,32 @@ import streamlit as st
 import plotly.graph_objects as go
 from utils.computations import compute_monthly_returns
 import pandas as pd
+import calendar
+from utils.data_loader import USER_FILE_PREFIX, dataset_options, get_series
+from utils.day_index import series_day_index
+from utils.window_optimizer import optimize_windows, window_matrix, top_windows
+from utils.rendering import plot
 
-def monthly_window_tab(default_df, custom_dfs):
+def monthly_window_tab(panel, custom_dfs, day_index=None, reports=None):
     st.markdown("### Monthly Buy & Hold Window")
     c1, c2, _, _ = st.columns(4)
-    sd = c1.number_input("Start Day", 1, 28, 2, key='sd_mon')
-    ed = c2.number_input("End Day", 1, 31, 13, key='ed_mon')
+    sd = c1.number_input("Start Day", 1, 28, 2, key='sd_mon', persist_state='session')
+    ed = c2.number_input("End Day", 1, 31, 13, key='ed_mon', persist_state='session')
     st.markdown("<small style='color:#aaa;'>Includes both start & end days.</small>", unsafe_allow_html=True)
-    stocks = sorted(default_df['stock'].unique()) + [f"User File: {n}" for n, _ in custom_dfs]
-    selected = st.selectbox("Select Stock Dataset", stocks, key='sel_mon')
-    df_sel = (
-        dict(custom_dfs).get(selected.replace("User File: ", "")) 
-        if selected.startswith("User File:") 
-        else default_df[default_df['stock']==selected].drop(columns=['stock'])
-    )
+    stocks = dataset_options(panel, custom_dfs)
+    selected = st.selectbox("Select Stock Dataset", stocks, key='sel_mon', persist_state='session')
+    df_sel = get_series(panel, custom_dfs, selected)
+    if 'close' not in df_sel.columns:
+        st.error("Needs a 'close' column in data.")
+        return
     if sd < ed:
-        df_mon = compute_monthly_returns(df_sel, sd, ed)
+        default = not selected.startswith(USER_FILE_PREFIX)
+        df_mon = reports.for_stock('monthly', selected, (sd, ed)) if reports is not None and default else None
+        if df_mon is None:
+            if day_index is not None and default:
+                df_mon = day_index.monthly_returns(selected, sd, ed)
+            else:
+                df_mon = compute_monthly_returns(df_sel, sd, ed, by_stock=False)
         cA, cB = st.columns(2)
         with cA:
             styled = df_mon.style.apply(
@@ -38,6 +48,47 @@ def monthly_window_tab(default_df, custom_dfs):
                 font_color='var(--fg)',
                 height=400
             )
-            st.plotly_chart(fig, use_container_width=True)
+            plot(fig, 'monthly_bar', use_container_width=True)
+        with st.expander("Best months across the universe for this window"):
+            uni = reports.get('monthly', (sd, ed)) if reports is not None else None
+            if uni is None:
+                uni = day_index.monthly_table(sd, ed) if day_index is not None else compute_monthly_returns(panel.frame, sd, ed)
+            months = st.multiselect("Months", list(calendar.month_abbr)[1:], key='uni_months_mon', persist_state='session')
+            if months:
+                uni = uni[uni['Month'].isin(months)]
+            top = uni.sort_values('Avg Return (%)', ascending=False).head(25).reset_index(drop=True)
+            st.dataframe(top, use_container_width=True)
     else:
         st.warning("Start day must precede end day.")
+
+    st.markdown("---")
+    if st.toggle("Optimize start/end days", key='opt_mon', persist_state='session'):
+        scopes = ["Selected dataset"] + (["Whole universe"] if day_index is not None else [])
+        scope = st.radio("Scope", scopes, horizontal=True, key='opt_scope_mon', persist_state='session')
+        if scope == "Whole universe":
+            grid = optimize_windows(day_index)
+        elif day_index is not None and not selected.startswith(USER_FILE_PREFIX):
+            grid = optimize_windows(day_index, [selected])
+        else:
+            grid = optimize_windows(series_day_index(df_sel, selected))
+        c1, c2, _, _ = st.columns(4)
+        month = c1.selectbox("Month", list(calendar.month_abbr)[1:], key='opt_month_mon', persist_state='session')
+        metric = c2.selectbox("Metric", ['Avg Return (%)', 'Positive Ratio (%)'], key='opt_metric_mon', persist_state='session')
+        cA, cB = st.columns(2)
+        with cA:
+            mat = window_matrix(grid, month, metric)
+            fig = go.Figure(go.Heatmap(
+                z=mat.values, x=mat.columns, y=mat.index, colorscale='RdYlGn',
+                zmid=0 if metric == 'Avg Return (%)' else 50,
+                hovertemplate="Start %{y} → End %{x}: %{z:.2f}<extra></extra>"
+            ))
+            fig.update_layout(
+                xaxis_title="End Day", yaxis_title="Start Day",
+                plot_bgcolor='var(--bg)',
+                paper_bgcolor='var(--bg)',
+                font_color='var(--fg)',
+                height=500
+            )
+            plot(fig, 'window_optimizer', use_container_width=True)
+        with cB:
+            st.dataframe(top_windows(grid, metric), use_container_width=True, height=500)
@@ -3,6 +3,13 @@ import difflib
 import pandas as pd
 import datetime
 import calendar
+import plotly.graph_objects as go
+from utils.screener import screen_universe
+from utils.backtester import run_backtest
+from utils.data_loader import USER_FILE_PREFIX
+from utils.jobs import job_manager, job_result
+from utils.result_cache import dataset_key
+from utils.rendering import plot
 
 # Utility: compute returns over calendar window ignoring year, using nearest trading days
 def compute_period_returns(df, start_md, end_md, date_col, price_col):
@@ -31,15 +38,46 @@ def compute_period_returns(df, start_md, end_md, date_col, price_col):
     return pd.DataFrame(records)
 
 
-def stock_screener_tab(default_df, custom_dfs):
+def screen_results(default_df, custom_dfs, sd_md, ed_md, price_col, day_index=None, reports=None, progress=None):
+    """Ranked screener table (with Sr.No) for the universe plus each uploaded file; runs off the script thread."""
+    # Default universe: batch-precomputed table, else the day-of-year index, else one vectorized pass
+    scr = reports.get('screener', (sd_md, ed_md)) if reports is not None else None
+    if scr is None:
+        scr = day_index.screen(sd_md, ed_md) if day_index is not None else screen_universe(default_df, sd_md, ed_md, price_col)
+    results = list(scr.itertuples(index=False, name=None))
+    # Custom files
+    for i, (name, df) in enumerate(custom_dfs):
+        if progress:
+            progress((i + 1) / (len(custom_dfs) + 1), f"Screening {name}")
+        dfc = df.copy()
+        if isinstance(dfc.index, pd.DatetimeIndex):
+            dfc = dfc.reset_index()
+        cols2 = {c.lower(): c for c in dfc.columns}
+        date2 = next((v for k, v in cols2.items() if 'date' in k), None)
+        price2 = next((cols2[k] for k in ['close', 'adj_close', 'adjusted_close', 'price'] if k in cols2), None)
+        if date2 and price2:
+            pr = compute_period_returns(dfc, sd_md, ed_md, date2, price2)
+            if not pr.empty:
+                avg = pr['return'].mean()
+                pos = (pr['return'] > 0).mean() * 100
+                neg = (pr['return'] < 0).mean() * 100
+                results.append((f"{USER_FILE_PREFIX}{name}", avg, pos, neg))
+
+    scr_df = pd.DataFrame(results, columns=['Ticker', 'Avg Return (%)', 'Positive Ratio (%)', 'Negative Ratio (%)'])
+    scr_df = scr_df.sort_values('Avg Return (%)', ascending=False).reset_index(drop=True)
+    scr_df.insert(0, 'Sr.No', scr_df.index + 1)
+    return scr_df
+
+
+def stock_screener_tab(default_df, custom_dfs, day_index=None, reports=None):
     """Stock Screener with calendar-style inputs for DD/MM windows."""
     st.markdown("### Stock Screener: Calendar Window (Select Dates)")
 
-    # Detect date and price columns
-    df0 = default_df.copy()
-    if isinstance(df0.index, pd.DatetimeIndex):
-        df0 = df0.reset_index()
-    cols = {c.lower(): c for c in df0.columns}
+    # Detect date and price columns (from the names only; no need to copy the universe)
+    names = list(default_df.columns)
+    if isinstance(default_df.index, pd.DatetimeIndex):
+        names = [default_df.index.name or 'index'] + names
+    cols = {c.lower(): c for c in names}
     date_col = next((v for k, v in cols.items() if 'date' in k), None)
     price_col = next((cols[k] for k in ['close', 'adj_close', 'adjusted_close', 'price'] if k in cols), None)
     if not date_col or not price_col:
@@ -48,13 +86,13 @@ def stock_screener_tab(default_df, custom_dfs):
 
     # Inputs on one line: search, start month/day, end month/day
     c1, c2, c3, c4, c5 = st.columns(5)
-    search = c1.text_input("Search Ticker", key='scr_search')
+    search = c1.text_input("Search Ticker", key='scr_search', persist_state='session')
     # Start Date: month and day selectboxes
-    start_month = c2.selectbox("Start Month", list(calendar.month_abbr)[1:], key='scr_start_month')
-    start_day = c3.selectbox("Start Day", list(range(1, calendar.monthrange(2000, list(calendar.month_abbr).index(start_month))[1] + 1)), key='scr_start_day')
+    start_month = c2.selectbox("Start Month", list(calendar.month_abbr)[1:], key='scr_start_month', persist_state='session')
+    start_day = c3.selectbox("Start Day", list(range(1, calendar.monthrange(2000, list(calendar.month_abbr).index(start_month))[1] + 1)), key='scr_start_day', persist_state='session')
     # End Date: month and day selectboxes
-    end_month = c4.selectbox("End Month", list(calendar.month_abbr)[1:], key='scr_end_month')
-    end_day = c5.selectbox("End Day", list(range(1, calendar.monthrange(2000, list(calendar.month_abbr).index(end_month))[1] + 1)), key='scr_end_day')
+    end_month = c4.selectbox("End Month", list(calendar.month_abbr)[1:], key='scr_end_month', persist_state='session')
+    end_day = c5.selectbox("End Day", list(range(1, calendar.monthrange(2000, list(calendar.month_abbr).index(end_month))[1] + 1)), key='scr_end_day', persist_state='session')
 
     # Build month-day tuples
     sd_md = (list(calendar.month_abbr).index(start_month), start_day)
@@ -64,39 +102,13 @@ def stock_screener_tab(default_df, custom_dfs):
 
     # Once inputs valid, compute
     if sd_md <= ed_md:
-        results = []
-        # Default universe
-        for stk in sorted(default_df['stock'].unique()):
-            df_stk = default_df[default_df['stock'] == stk].copy()
-            if isinstance(df_stk.index, pd.DatetimeIndex):
-                df_stk = df_stk.reset_index()
-            pr = compute_period_returns(df_stk, sd_md, ed_md, date_col, price_col)
-            if not pr.empty:
-                avg = pr['return'].mean()
-                pos = (pr['return'] > 0).mean() * 100
-                neg = (pr['return'] < 0).mean() * 100
-                results.append((stk, avg, pos, neg))
-        # Custom files
-        for name, df in custom_dfs:
-            dfc = df.copy()
-            if isinstance(dfc.index, pd.DatetimeIndex):
-                dfc = dfc.reset_index()
-            cols2 = {c.lower(): c for c in dfc.columns}
-            date2 = next((v for k, v in cols2.items() if 'date' in k), None)
-            price2 = next((cols2[k] for k in ['close', 'adj_close', 'adjusted_close', 'price'] if k in cols2), None)
-            if date2 and price2:
-                pr = compute_period_returns(dfc, sd_md, ed_md, date2, price2)
-                if not pr.empty:
-                    avg = pr['return'].mean()
-                    pos = (pr['return'] > 0).mean() * 100
-                    neg = (pr['return'] < 0).mean() * 100
-                    results.append((f"User File: {name}", avg, pos, neg))
-
-        if results:
-            scr_df = pd.DataFrame(results, columns=['Ticker', 'Avg Return (%)', 'Positive Ratio (%)', 'Negative Ratio (%)'])
-            scr_df = scr_df.sort_values('Avg Return (%)', ascending=False).reset_index(drop=True)
-            scr_df.insert(0, 'Sr.No', scr_df.index + 1)
+        key = ('screener', dataset_key(default_df), tuple((n, dataset_key(df)) for n, df in custom_dfs), sd_md, ed_md, price_col)
+        job = job_manager().submit(key, screen_results, default_df, custom_dfs, sd_md, ed_md, price_col, day_index, reports)
+        scr_df = job_result(job, "Screening")
+        if scr_df is None:
+            return
 
+        if not scr_df.empty:
             # Highlight search match
             best = None
             if search:
@@ -124,5 +136,34 @@ def stock_screener_tab(default_df, custom_dfs):
             )
 
             st.dataframe(styled, use_container_width=True)
+
+            if day_index is not None:
+                with st.expander("Backtest this window"):
+                    b1, b2, _, _ = st.columns(4)
+                    top_n = b1.selectbox("Tickers (top by Avg Return)", [10, 25, 50, 'All'], key='bt_top', persist_state='session')
+                    cost = b2.number_input("Cost per side (bps)", 0.0, 100.0, 5.0, 1.0, key='bt_cost', persist_state='session')
+                    ranked = [t for t in scr_df['Ticker'] if t in day_index._codes]
+                    bt = run_backtest(day_index, (sd_md, ed_md), ranked if top_n == 'All' else ranked[:top_n], cost)
+                    port = bt.portfolio()
+                    if port['Positions'].sum() == 0:
+                        st.info("No trades for this window.")
+                    else:
+                        m1, m2, m3, m4 = st.columns(4)
+                        m1.metric("Total Return", f"{(port['Equity'].iloc[-1] - 1) * 100:.1f}%")
+                        m2.metric("Max Drawdown", f"{port['Drawdown (%)'].min():.1f}%")
+                        m3.metric("Hit Ratio", f"{(port['Return (%)'] > 0).sum() / (port['Positions'] > 0).sum() * 100:.0f}%")
+                        m4.metric("Avg Turnover / Year", f"{port['Turnover (%)'].mean():.0f}%")
+                        fig = go.Figure()
+                        fig.add_trace(go.Scatter(x=port['Year'], y=port['Equity'], mode='lines+markers', name='Equity'))
+                        fig.add_trace(go.Bar(x=port['Year'], y=port['Drawdown (%)'], name='Drawdown (%)', yaxis='y2', marker_color='red', opacity=0.4))
+                        fig.update_layout(
+                            yaxis=dict(title="Equity (growth of 1)"),
+                            yaxis2=dict(title="Drawdown (%)", overlaying='y', side='right'),
+                            hovermode='x unified', height=400,
+                            plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', font_color='var(--fg)'
+                        )
+                        plot(fig, 'backtest', use_container_width=True)
+                        st.dataframe(bt.summary(), use_container_width=True)
+                        st.caption("*Tickers are picked from this table over the same history, so results are in-sample.*")
         else:
             st.info("No data available for the selected window.")
@@ -1,17 +1,28 @@
 import streamlit as st
+import plotly.graph_objects as go
 from utils.computations import compute_seasonality_heatmap
 import pandas as pd
+from utils.data_loader import USER_FILE_PREFIX, dataset_options, get_series
+from utils.precomputed import heatmap_from_long
+from utils.seasonality import panel_seasonality
+from utils.rendering import plot
 
-def seasonality_tab(default_df, custom_dfs):
+def seasonality_tab(panel, custom_dfs, reports=None):
     st.markdown("### Seasonality Heatmap")
-    stocks = sorted(default_df['stock'].unique()) + [f"User File: {n}" for n, _ in custom_dfs]
-    selected = st.selectbox("Select Stock Dataset", stocks, key='sel_sea')
-    df_sel = (
-        dict(custom_dfs).get(selected.replace("User File: ", "")) 
-        if selected.startswith("User File:") 
-        else default_df[default_df['stock']==selected].drop(columns=['stock'])
-    )
-    heat, pr, nr = compute_seasonality_heatmap(df_sel)
+    stocks = dataset_options(panel, custom_dfs)
+    selected = st.selectbox("Select Stock Dataset", stocks, key='sel_sea', persist_state='session')
+    df_sel = get_series(panel, custom_dfs, selected)
+    if 'close' not in df_sel.columns:
+        st.error("Needs a 'close' column in data.")
+        return
+    default = not selected.startswith(USER_FILE_PREFIX)
+    long = reports.for_stock('seasonality', selected) if reports is not None and default else None
+    if long is not None:
+        heat, pr, nr = heatmap_from_long(long)
+    elif default:
+        heat, pr, nr = panel_seasonality(panel).heatmap(selected)
+    else:
+        heat, pr, nr = compute_seasonality_heatmap(df_sel)
     def style_cell(v):
         if pd.isna(v): return ''
         if v >= 5: return 'background-color:#004d00;color:#fff'
@@ -29,3 +40,32 @@ def seasonality_tab(default_df, custom_dfs):
         axis=1
     )
     st.dataframe(styled_r, use_container_width=True)
+
+    # Cross-sectional views share the one (stock x year x month) cube
+    if 'close' not in panel.frame.columns:
+        return
+    st.markdown("---")
+    st.markdown("### Market Seasonality")
+    cube = panel_seasonality(panel)
+    views = ["Median return", "Mean return", "Breadth (% up)"] + (["Rank vs universe"] if default else [])
+    view = st.radio("View", views, horizontal=True, key='view_sea', persist_state='session')
+    if view == "Breadth (% up)":
+        mat, mid, fmt = cube.breadth(), 50, "%{z:.0f}%"
+    elif view == "Rank vs universe":
+        mat, mid, fmt = cube.ranks(selected), 50, "%{z:.0f} pctl"
+    else:
+        mat, mid, fmt = cube.market('median' if view == "Median return" else 'mean'), 0, "%{z:.2f}%"
+    fig = go.Figure(go.Heatmap(
+        z=mat.values, x=mat.columns, y=mat.index, colorscale='RdYlGn', zmid=mid,
+        hovertemplate=f"%{{y}} %{{x}}: {fmt}<extra></extra>"
+    ))
+    fig.update_layout(
+        yaxis=dict(autorange='reversed', dtick=1),
+        plot_bgcolor='var(--bg)',
+        paper_bgcolor='var(--bg)',
+        font_color='var(--fg)',
+        height=400
+    )
+    plot(fig, 'market_seasonality', use_container_width=True)
+    if view == "Rank vs universe":
+        st.caption(f"*Percentile of {selected}'s monthly return among {len(cube.tickers)} tickers; 100 = best.*")
@@ -2,23 +2,27 @@ import streamlit as st
 import plotly.graph_objects as go
 from utils.computations import compute_weekday_returns
 import pandas as pd
+from utils.data_loader import USER_FILE_PREFIX, dataset_options, get_series
+from utils.intraday import BUCKETS, is_intraday, daily_bars, weekday_time_grid, grid_matrix
+from utils.rendering import plot
 
-def weekday_intraday_tab(default_df, custom_dfs, labels, periods):
+def weekday_intraday_tab(panel, custom_dfs, labels, periods, reports=None):
     st.markdown("### Average Intraday Return by Weekday")
     c1, c2, _, _ = st.columns(4)
-    sp_label = c1.selectbox("Start Period", labels, 0, key='sp_wd')
-    ep_label = c2.selectbox("End Period", labels, len(labels)-1, key='ep_wd')
+    sp_label = c1.selectbox("Start Period", labels, 0, key='sp_wd', persist_state='session')
+    ep_label = c2.selectbox("End Period", labels, len(labels)-1, key='ep_wd', persist_state='session')
     st.markdown("<small style='color:#aaa;'>Includes both start & end months.</small>", unsafe_allow_html=True)
     sp, ep = periods[labels.index(sp_label)], periods[labels.index(ep_label)]
-    stocks = sorted(default_df['stock'].unique()) + [f"User File: {n}" for n, _ in custom_dfs]
-    selected = st.selectbox("Select Stock Dataset", stocks, key='sel_wd')
-    df_sel = (
-        dict(custom_dfs).get(selected.replace("User File: ", "")) 
-        if selected.startswith("User File:") 
-        else default_df[default_df['stock']==selected].drop(columns=['stock'])
-    )
+    stocks = dataset_options(panel, custom_dfs)
+    selected = st.selectbox("Select Stock Dataset", stocks, key='sel_wd', persist_state='session')
+    df_sel = get_series(panel, custom_dfs, selected)
+    intraday = df_sel is not None and is_intraday(df_sel)
     if sp <= ep:
-        df_wd = compute_weekday_returns(df_sel, sp, ep)
+        # Batch reports cover the full period only
+        full = sp == periods[0] and ep == periods[-1] and not selected.startswith(USER_FILE_PREFIX)
+        df_wd = reports.for_stock('weekday', selected) if reports is not None and full else None
+        if df_wd is None:
+            df_wd = compute_weekday_returns(daily_bars(df_sel) if intraday else df_sel, sp, ep)
         if df_wd is None:
             st.error("Needs 'open' & 'close' columns in data.")
         else:
@@ -42,6 +46,24 @@ def weekday_intraday_tab(default_df, custom_dfs, labels, periods):
                     font_color='var(--fg)',
                     height=400
                 )
-                st.plotly_chart(fig, use_container_width=True)
+                plot(fig, 'weekday_bar', use_container_width=True)
+        if intraday and df_wd is not None:
+            st.markdown("#### Weekday × Time of Day")
+            c1, _, _, _ = st.columns(4)
+            bucket = c1.selectbox("Bucket", BUCKETS, 1, key='bucket_wd', persist_state='session')
+            mat = grid_matrix(weekday_time_grid(df_sel, sp, ep, bucket))
+            fig = go.Figure(go.Heatmap(
+                z=mat.values, x=mat.columns, y=mat.index, colorscale='RdYlGn', zmid=0,
+                hovertemplate="%{y} %{x}: %{z:.2f}%<extra></extra>"
+            ))
+            fig.update_layout(
+                xaxis_title="Bucket start", yaxis=dict(autorange='reversed'),
+                plot_bgcolor='var(--bg)',
+                paper_bgcolor='var(--bg)',
+                font_color='var(--fg)',
+                height=400
+            )
+            plot(fig, 'weekday_time', use_container_width=True)
+            st.caption("*Open-to-close return of each bucket, averaged per weekday.*")
     else:
         st.error("Start period must precede end period.")
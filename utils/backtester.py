@@ -0,0 +1,153 @@
+import pandas as pd
+import numpy as np
+from utils.day_index import day_of_year
+from utils.result_cache import cached
+
+TRADE_COLUMNS = ['Ticker', 'Year', 'Entry', 'Exit', 'Return (%)', 'Max Drawdown (%)']
+SUMMARY_COLUMNS = ['Ticker', 'Trades', 'Avg Return (%)', 'Positive Ratio (%)', 'Total Return (%)', 'Max Drawdown (%)']
+PORTFOLIO_COLUMNS = ['Year', 'Positions', 'Invested (%)', 'Turnover (%)', 'Return (%)', 'Equity', 'Drawdown (%)']
+
+def window_plan(windows, stocks=None):
+    """
+    Normalize a strategy into hashable ((start_md, end_md), tickers) groups. windows is either one
+    (start_md, end_md) pair for stocks (None = all), or a mapping ticker -> (start_md, end_md).
+    """
+    if isinstance(windows, dict):
+        groups = {}
+        for t, w in windows.items():
+            groups.setdefault((tuple(w[0]), tuple(w[1])), []).append(t)
+        return tuple((w, tuple(ts)) for w, ts in groups.items())
+    start_md, end_md = windows
+    return (((tuple(start_md), tuple(end_md)), None if stocks is None else tuple(stocks)),)
+
+def _range_min(close, first, last):
+    """min(close[f:l+1]) for each row pair, in one reduceat over pairs sorted by start."""
+    if not len(first):
+        return np.empty(0)
+    order = np.argsort(first, kind='stable')
+    bounds = np.column_stack([first[order], last[order] + 1]).ravel()
+    mins = np.minimum.reduceat(np.append(close, np.nan), bounds)[::2]
+    out = np.empty(len(first))
+    out[order] = mins
+    return out
+
+class Backtest:
+    """
+    One trade per (ticker, year): buy the first close on or after the window start, sell the last
+    close on or before its end (the Screener's window semantics). Years without a trade are cash.
+    Returns are gross; cost_bps is charged on each side when compounding.
+    """
+
+    def __init__(self, tickers, years, returns, mae, entry, exit, cost_bps=0.0):
+        self.tickers = tickers
+        self.years = years
+        self.returns = returns
+        self.mae = mae
+        self.entry = entry
+        self.exit = exit
+        self.cost_bps = cost_bps
+
+    @property
+    def net(self):
+        return self.returns - 2 * self.cost_bps / 100
+
+    def trades(self):
+        s, y = np.nonzero(~np.isnan(self.returns))
+        return pd.DataFrame({
+            'Ticker': np.asarray(self.tickers, dtype=object)[s],
+            'Year': self.years[y],
+            'Entry': self.entry[s, y],
+            'Exit': self.exit[s, y],
+            'Return (%)': self.returns[s, y].round(2),
+            'Max Drawdown (%)': self.mae[s, y].round(2),
+        })[TRADE_COLUMNS]
+
+    def _paths(self):
+        growth = 1 + np.nan_to_num(self.net, nan=0.0).T / 100
+        equity = np.cumprod(growth, axis=0)
+        peak = np.maximum.accumulate(equity, axis=0)
+        prev_equity = np.vstack([np.ones((1, equity.shape[1])), equity[:-1]])
+        prev_peak = np.vstack([np.ones((1, equity.shape[1])), peak[:-1]])
+        # The trade's trough: equity going in times the worst close inside the window
+        trough = prev_equity * (1 + np.nan_to_num(np.minimum(self.mae, 0), nan=0.0).T / 100)
+        drawdown = np.minimum(trough / prev_peak, equity / peak) * 100 - 100
+        return equity, drawdown
+
+    def equity(self):
+        """(year x ticker) growth of 1 compounded over the ticker's trades."""
+        return pd.DataFrame(self._paths()[0], index=pd.Index(self.years, name='Year'), columns=self.tickers)
+
+    def drawdown(self):
+        """(year x ticker) deepest drawdown (%) from the running peak reached in each year, intra-trade lows included."""
+        return pd.DataFrame(self._paths()[1], index=pd.Index(self.years, name='Year'), columns=self.tickers).round(2)
+
+    def summary(self):
+        """Per-ticker trade count, hit ratios, compounded return and max drawdown."""
+        ret = self.returns
+        n = (~np.isnan(ret)).sum(axis=1)
+        equity, drawdown = self._paths()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out = pd.DataFrame({
+                'Ticker': np.asarray(self.tickers, dtype=object),
+                'Trades': n,
+                'Avg Return (%)': np.nansum(ret, axis=1) / n,
+                'Positive Ratio (%)': (ret > 0).sum(axis=1) / n * 100,
+                'Total Return (%)': (equity[-1] - 1) * 100 if len(equity) else np.nan,
+                'Max Drawdown (%)': drawdown.min(axis=0) if len(drawdown) else np.nan,
+            })
+        return out[n > 0].round(2).reset_index(drop=True)[SUMMARY_COLUMNS]
+
+    def portfolio(self):
+        """
+        Equal capital slots, one per ticker: each year every slot with a trade is bought and sold,
+        the rest sit in cash. Turnover is traded value (both sides) as % of capital. Drawdown is
+        from the running peak of year-end equity, starting at 1; unlike drawdown() it leaves out
+        intra-trade lows, which fall on different days for different slots.
+        """
+        n = max(len(self.tickers), 1)
+        held = (~np.isnan(self.returns)).sum(axis=0)
+        ret = np.nansum(self.net, axis=0) / n
+        equity = np.cumprod(1 + ret / 100)
+        peak = np.maximum.accumulate(np.append(1.0, equity))[1:]
+        return pd.DataFrame({
+            'Year': self.years,
+            'Positions': held,
+            'Invested (%)': held / n * 100,
+            'Turnover (%)': 2 * held / n * 100,
+            'Return (%)': ret,
+            'Equity': equity,
+            'Drawdown (%)': (equity / peak - 1) * 100,
+        }).round(4)[PORTFOLIO_COLUMNS]
+
+@cached('backtest')
+def _backtest(day_index, plan, cost_bps):
+    n_years = len(day_index.years)
+    tickers, parts = [], []
+    for (start_md, end_md), stocks in plan:
+        stocks = list(day_index.tickers if stocks is None else [s for s in stocks if s in day_index._codes])
+        codes = np.array([day_index.code(s) for s in stocks], dtype='int64')
+        first = day_index.first_idx[codes, :, day_of_year(*start_md)]
+        last = day_index.last_idx[codes, :, day_of_year(*end_md)]
+        tickers += stocks
+        parts.append((first, last))
+    first = np.concatenate([f for f, _ in parts]) if parts else np.empty((0, n_years), dtype='int32')
+    last = np.concatenate([l for _, l in parts]) if parts else np.empty((0, n_years), dtype='int32')
+
+    # A window holding no trading day would sell before it buys: no trade that year
+    ok = (first >= 0) & (last >= first)
+    p0, p1 = day_index._prices(first, last, ok)
+    returns = (p1 / p0 - 1) * 100
+    mae = np.full(first.shape, np.nan)
+    mae[ok] = (_range_min(day_index.close, first[ok], last[ok]) / p0[ok] - 1) * 100
+
+    nat = np.iinfo('int64').min
+    entry = np.where(ok, day_index.dates[np.maximum(first, 0)], nat).view('datetime64[ns]')
+    exit = np.where(ok, day_index.dates[np.maximum(last, 0)], nat).view('datetime64[ns]')
+    return Backtest(tickers, day_index.years, returns, mae, entry, exit, cost_bps)
+
+def run_backtest(day_index, windows, stocks=None, cost_bps=0.0):
+    """
+    Backtest seasonal windows over a DayIndex, vectorized over tickers and years (one gather per
+    distinct window). windows: a (start_md, end_md) pair, or a mapping ticker -> pair.
+    """
+    return _backtest(day_index, window_plan(windows, stocks), float(cost_bps))
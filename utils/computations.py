@@ -1,64 +1,76 @@
-import streamlit as st
 import pandas as pd
 import numpy as np
 import calendar
-from datetime import datetime
+from utils.correlation import CorrelationEngine
+from utils.result_cache import cached
+from utils.seasonality import SeasonalityCube
 
-@st.cache_data
-def compute_monthly_returns(df, start_day, end_day):
-    df2 = df.copy()
-    df2['year'], df2['month'], df2['day'] = df2.index.year, df2.index.month, df2.index.day
-    data = []
-    for m in range(1, 13):
-        returns = []
-        monthly = df2[df2['month']==m]
-        for yr in monthly['year'].unique():
-            d = monthly[monthly['year']==yr]
-            start, end = d[d['day']>=start_day], d[d['day']<=end_day]
-            if not start.empty and not end.empty:
-                r = (end['close'].iloc[-1] - start['close'].iloc[0]) / start['close'].iloc[0] * 100
-                returns.append(r)
-        if returns:
-            avg = np.mean(returns)
-            pos = sum(r>0 for r in returns)/len(returns)*100
-            neg = sum(r<0 for r in returns)/len(returns)*100
-            data.append((calendar.month_abbr[m], round(avg,2), round(pos,2), round(neg,2)))
-    return pd.DataFrame(data, columns=['Month','Avg Return (%)','Positive Ratio (%)','Negative Ratio (%)'])
+MONTHLY_COLUMNS = ['Month','Avg Return (%)','Positive Ratio (%)','Negative Ratio (%)']
+
+@cached('monthly')
+def compute_monthly_returns(df, start_day, end_day, by_stock=None):
+    """
+    Per-month stats of the return from the first close with day >= start_day to the last close
+    with day <= end_day, across years. A frame with a 'stock' column gets one table for all stocks
+    unless by_stock=False.
+    """
+    multi = 'stock' in df.columns if by_stock is None else by_stock
+    keys = ['stock','year','month'] if multi else ['year','month']
+    df2 = pd.DataFrame({
+        'year': df.index.year, 'month': df.index.month, 'day': df.index.day,
+        'close': df['close'].to_numpy(),
+        **({'stock': df['stock'].to_numpy()} if multi else {}),
+    })
+    # One grouped pass: first qualifying close and last qualifying close per (stock, year, month)
+    start = df2[df2['day']>=start_day].drop_duplicates(keys, keep='first')
+    end = df2[df2['day']<=end_day].drop_duplicates(keys, keep='last')
+    win = start.merge(end, on=keys, suffixes=('_start','_end'))
+    win['return'] = (win['close_end'] - win['close_start']) / win['close_start'] * 100
+    by = ['stock','month'] if multi else ['month']
+    grp = win.groupby(by)['return']
+    out = pd.DataFrame({
+        'Avg Return (%)': grp.mean(),
+        'Positive Ratio (%)': win['return'].gt(0).groupby([win[c] for c in by]).mean() * 100,
+        'Negative Ratio (%)': win['return'].lt(0).groupby([win[c] for c in by]).mean() * 100,
+    }).round(2).reset_index()
+    out['month'] = out['month'].map(lambda m: calendar.month_abbr[m])
+    out = out.rename(columns={'stock': 'Stock', 'month': 'Month'})
+    return out[(['Stock'] if multi else []) + MONTHLY_COLUMNS]
+
+WEEKDAYS = ['Monday','Tuesday','Wednesday','Thursday','Friday']
+WEEKDAY_COLUMNS = ['Weekday','Avg Return (%)','Positive Ratio (%)','Negative Ratio (%)']
+
+def period_bounds(start_period, end_period):
+    """[start, end) timestamps covering the whole start..end months (end-exclusive, so intraday bars on the last day count)."""
+    start = pd.Timestamp(start_period.year, start_period.month, 1)
+    end = pd.Timestamp(end_period.year, end_period.month, 1) + pd.offsets.MonthBegin(1)
+    return start, end
 
-@st.cache_data
+@cached('weekday')
 def compute_weekday_returns(df, start_period, end_period):
-    start_dt = datetime(start_period.year, start_period.month, 1)
-    last = calendar.monthrange(end_period.year, end_period.month)[1]
-    end_dt = datetime(end_period.year, end_period.month, last)
-    df2 = df.loc[start_dt:end_dt]
-    if 'open' not in df2.columns or 'close' not in df2.columns:
+    if 'open' not in df.columns or 'close' not in df.columns:
         return None
-    df2['return'] = (df2['close'] - df2['open']) / df2['open'] * 100
-    df2['weekday'] = df2.index.day_name()
+    start, end = period_bounds(start_period, end_period)
+    in_period = (df.index >= start) & (df.index < end)
+    open_ = df['open'].to_numpy(dtype='float64')[in_period]
+    close = df['close'].to_numpy(dtype='float64')[in_period]
+    ret = pd.Series((close - open_) / open_ * 100)
+    weekday = df.index[in_period].dayofweek
     data = []
-    for wd in ['Monday','Tuesday','Wednesday','Thursday','Friday']:
-        sub = df2[df2['weekday']==wd]['return']
+    for i, wd in enumerate(WEEKDAYS):
+        sub = ret[weekday == i]
         if not sub.empty:
             avg, pos, neg = sub.mean(), (sub>0).sum()/len(sub)*100, (sub<0).sum()/len(sub)*100
             data.append((wd, round(avg,2), round(pos,2), round(neg,2)))
-    return pd.DataFrame(data, columns=['Weekday','Avg Return (%)','Positive Ratio (%)','Negative Ratio (%)'])
+    return pd.DataFrame(data, columns=WEEKDAY_COLUMNS)
 
-@st.cache_data
+@cached('seasonality')
 def compute_seasonality_heatmap(df):
-    df2 = df.copy()
-    df2['year'], df2['month'] = df2.index.year, df2.index.month
-    grp = df2.groupby(['year','month'])['close']
-    ret = ((grp.last() - grp.first()) / grp.first() * 100).reset_index(name='return')
-    pivot = ret.pivot(index='year', columns='month', values='return')
-    pivot.columns = [calendar.month_abbr[m] for m in pivot.columns]
-    pivot = pivot.reindex(columns=calendar.month_abbr[1:], fill_value=np.nan).round(2)
-    pos = (pivot > 0).sum() / pivot.notna().sum() * 100
-    neg = (pivot < 0).sum() / pivot.notna().sum() * 100
-    return pivot, pos.round(2), neg.round(2)
+    return SeasonalityCube.for_series(df).heatmap('series')
 
-@st.cache_data
-def compute_correlation(df):
-    wide = df.pivot_table(values='close', index=df.index, columns='stock').ffill()
-    returns = wide.pct_change().dropna()
-    corr = returns.corr() * 100  # percentages
-    return corr, returns
+@cached('correlation')
+def compute_correlation(df, start=None, end=None):
+    """Correlation (%) of each ticker's own daily returns, plus the dates x tickers returns matrix."""
+    order = np.lexsort((df.index.to_numpy(), pd.factorize(df['stock'], sort=True)[0]))
+    engine = CorrelationEngine.from_frame(df.iloc[order], start=start, end=end)
+    return engine.corr, engine.returns
@@ -0,0 +1,255 @@
+import copy
+import pandas as pd
+import numpy as np
+from utils.price_store import live_source
+from utils.result_cache import cached
+
+class RunningCorrelation:
+    """
+    Pairwise-complete Pearson correlation kept as running sums of x, x^2 and xy over the rows
+    where both columns are present, so appending (or dropping) rows is a rank-k update rather
+    than a full recomputation. Matches DataFrame.corr() on NaN-holed data.
+    """
+
+    def __init__(self, n_cols):
+        shape = (n_cols, n_cols)
+        self.n = np.zeros(shape)
+        self.sx = np.zeros(shape)    # sx[i, j]: sum of x_i over rows where x_j is present too
+        self.sxx = np.zeros(shape)
+        self.sxy = np.zeros(shape)
+
+    @classmethod
+    def from_returns(cls, values):
+        rc = cls(values.shape[1])
+        rc.update(values)
+        return rc
+
+    def _accumulate(self, values, sign):
+        values = np.asarray(values, dtype='float64')
+        present = (~np.isnan(values)).astype('float64')
+        x = np.nan_to_num(values, nan=0.0)
+        self.n += sign * (present.T @ present)
+        self.sx += sign * (x.T @ present)
+        self.sxx += sign * ((x * x).T @ present)
+        self.sxy += sign * (x.T @ x)
+
+    def update(self, values):
+        """Add rows (T x N, NaN for missing)."""
+        self._accumulate(values, 1)
+
+    def remove(self, values):
+        """Drop rows previously added."""
+        self._accumulate(values, -1)
+
+    def grow(self, n_new):
+        """Append columns for new tickers; they have no history yet, so their sums are zero."""
+        for name in ('n', 'sx', 'sxx', 'sxy'):
+            setattr(self, name, np.pad(getattr(self, name), ((0, n_new), (0, n_new))))
+
+    def corr(self):
+        n, sx, sxx = self.n, self.sx, self.sxx
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cov = n * self.sxy - sx * sx.T
+            var_x = n * sxx - sx * sx
+            c = cov / np.sqrt(var_x * var_x.T)
+        c[(n < 2) | ~(var_x > 0) | ~(var_x.T > 0)] = np.nan
+        np.fill_diagonal(c, np.where(np.isnan(np.diag(c)), np.nan, 1.0))
+        return np.clip(c, -1, 1)
+
+class RollingCorrelation:
+    """RunningCorrelation over the last `window` rows: each push adds new rows and drops the oldest."""
+
+    def __init__(self, window, n_cols):
+        self.window = window
+        self.running = RunningCorrelation(n_cols)
+        self.rows = np.empty((0, n_cols))
+
+    def push(self, values):
+        values = np.atleast_2d(np.asarray(values, dtype='float64'))
+        self.running.update(values)
+        self.rows = np.vstack([self.rows, values])
+        if len(self.rows) > self.window:
+            self.running.remove(self.rows[:-self.window])
+            self.rows = self.rows[-self.window:]
+        return self
+
+    def grow(self, n_new):
+        self.running.grow(n_new)
+        self.rows = np.pad(self.rows, ((0, 0), (0, n_new)), constant_values=np.nan)
+
+    def corr(self):
+        return self.running.corr()
+
+def rolling_pair_corr(x, y, window, min_periods=None):
+    """
+    Rolling Pearson correlation of two return series over pairwise-present rows, from cumulative
+    sums so each step costs O(1) whatever the window. Same result as x.rolling(window).corr(y).
+    """
+    min_periods = window if min_periods is None else min_periods
+    x, y = np.asarray(x, dtype='float64'), np.asarray(y, dtype='float64')
+    present = ~np.isnan(x) & ~np.isnan(y)
+    x0, y0 = np.where(present, x, 0.0), np.where(present, y, 0.0)
+    sums = np.vstack([present, x0, y0, x0 * x0, y0 * y0, x0 * y0]).astype('float64')
+    csum = np.concatenate([np.zeros((6, 1)), np.cumsum(sums, axis=1)], axis=1)
+    lag = np.maximum(np.arange(1, len(x) + 1) - window, 0)
+    n, sx, sy, sxx, syy, sxy = csum[:, 1:] - csum[:, lag]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        var_x, var_y = n * sxx - sx * sx, n * syy - sy * sy
+        r = (n * sxy - sx * sy) / np.sqrt(var_x * var_y)
+    r[(n < max(min_periods, 2)) | ~(var_x > 0) | ~(var_y > 0)] = np.nan
+    return np.clip(r, -1, 1)
+
+def rolling_corr_matrix(returns, date, window):
+    """Correlation (%) over the `window` rows of the returns matrix ending at `date`."""
+    block = returns.loc[:pd.Timestamp(date)].tail(window)
+    corr = RollingCorrelation(window, block.shape[1]).push(block.to_numpy()).corr()
+    return pd.DataFrame(corr * 100, index=returns.columns, columns=returns.columns)
+
+def date_bounded(df, start=None, end=None):
+    if start is None and end is None:
+        return df
+    return df.loc[(df.index >= pd.Timestamp(start or df.index.min())) & (df.index <= pd.Timestamp(end or df.index.max()))]
+
+def returns_matrix(df, price_col='close', start=None, end=None):
+    """
+    Dates x tickers matrix of each ticker's own close-to-close pct change (the first row of every
+    ticker is NaN), for a (stock, date)-sorted frame with a DatetimeIndex, optionally date-bounded.
+    """
+    df = date_bounded(df, start, end)
+    codes, tickers = pd.factorize(df['stock'], sort=True)
+    days, dates = pd.factorize(df.index, sort=True)
+    close = pd.to_numeric(df[price_col], errors='coerce').to_numpy(dtype='float64')
+    ret = np.full(len(close), np.nan)
+    same = codes[1:] == codes[:-1]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ret[1:] = np.where(same, close[1:] / close[:-1] - 1, np.nan)
+    values = np.full((len(dates), len(tickers)), np.nan)
+    values[days, codes] = ret
+    return pd.DataFrame(values, index=pd.DatetimeIndex(dates, name=df.index.name), columns=pd.Index(list(tickers), name='stock'))
+
+def top_pairs(corr, k=10):
+    """Top-k (stock1, stock2, value) by correlation over the upper triangle, via argpartition."""
+    values = corr.to_numpy()
+    iu, ju = np.triu_indices(len(values), 1)
+    vals = values[iu, ju]
+    ok = np.flatnonzero(~np.isnan(vals))
+    if len(ok) > k:
+        ok = ok[np.argpartition(-vals[ok], k - 1)[:k]]
+    ok = ok[np.lexsort((ok, -vals[ok]))]
+    labels = corr.index
+    return [(labels[iu[i]], labels[ju[i]], vals[i]) for i in ok]
+
+class CorrelationEngine:
+    """Returns matrix + running correlation sums for one universe and date range."""
+
+    def __init__(self, returns, last_close):
+        self.returns = returns
+        self.last_close = last_close          # ticker -> last close seen, to extend returns on append
+        self.running = RunningCorrelation.from_returns(returns.to_numpy())
+        self._rolling = {}
+        self._corr = None
+
+    @classmethod
+    def from_frame(cls, df, price_col='close', start=None, end=None):
+        df = date_bounded(df, start, end)
+        returns = returns_matrix(df, price_col)
+        last_close = df.groupby('stock', observed=True)[price_col].last().astype('float64').to_dict()
+        return cls(returns, last_close)
+
+    @property
+    def tickers(self):
+        return list(self.returns.columns)
+
+    @property
+    def nbytes(self):
+        """Resident size: returns matrix, running sums, the cached matrix and rolling states."""
+        sums = [self.running.n, self.running.sx, self.running.sxx, self.running.sxy]
+        for state in self._rolling.values():
+            sums += [state.rows, state.running.n, state.running.sx, state.running.sxx, state.running.sxy]
+        size = int(self.returns.memory_usage(index=True).sum()) + sum(a.nbytes for a in sums)
+        return size + (int(self._corr.memory_usage(index=True).sum()) if self._corr is not None else 0)
+
+    @property
+    def corr(self):
+        """Correlation in percent, tickers x tickers."""
+        if self._corr is None:
+            self._corr = pd.DataFrame(self.running.corr() * 100, index=self.returns.columns, columns=self.returns.columns)
+        return self._corr
+
+    def top_pairs(self, k=10):
+        return top_pairs(self.corr, k)
+
+    def rolling(self, window):
+        """Live window-bounded correlation of the latest `window` days; kept current by append()."""
+        if window not in self._rolling:
+            self._rolling[window] = RollingCorrelation(window, len(self.tickers)).push(self.returns.to_numpy()[-window:])
+        return self._rolling[window]
+
+    def rolling_pair(self, s1, s2, window, min_periods=None):
+        """Rolling correlation (%) of one pair over the whole returns history."""
+        r = rolling_pair_corr(self.returns[s1].to_numpy(), self.returns[s2].to_numpy(), window, min_periods)
+        return pd.Series(r * 100, index=self.returns.index, name=f"{s1} / {s2}")
+
+    def append(self, bars, price_col='close'):
+        """
+        Fold newly appended trading days (stock column, DatetimeIndex, dates after the current
+        range) into the returns matrix and running sums without touching earlier history.
+        """
+        if len(bars) and len(self.returns) and bars.index.min() <= self.returns.index.max():
+            raise ValueError("appended bars must be dated after the current range")
+        new = [t for t in pd.unique(bars['stock']) if t not in self.last_close]
+        if new:
+            self.running.grow(len(new))
+            for state in self._rolling.values():
+                state.grow(len(new))
+            self.returns = self.returns.reindex(columns=self.tickers + list(new))
+        prev = pd.Series(self.last_close, dtype='float64').reindex(self.returns.columns)
+        wide = bars.pivot_table(index=bars.index, columns='stock', values=price_col, aggfunc='last', observed=True).reindex(columns=self.returns.columns)
+        # Each ticker's return is against its own previous close, wherever that was
+        rows = []
+        for _, px in wide.iterrows():
+            rows.append((px / prev - 1).where(px.notna()))
+            prev = px.where(px.notna(), prev)
+        new_returns = pd.DataFrame(rows, index=wide.index, columns=self.returns.columns)
+        self.running.update(new_returns.to_numpy())
+        for state in self._rolling.values():
+            state.push(new_returns.to_numpy())
+        self.returns = pd.concat([self.returns, new_returns])
+        self.last_close = prev.dropna().to_dict()
+        self._corr = None
+        return self
+
+@cached('window_pairs')
+def window_top_pairs(engine, as_of, window, k=10):
+    """
+    Top-k pairs over the `window` days to as_of. At the engine's last day this reads its live
+    rolling state, which append() keeps current; earlier dates rebuild that window's sums.
+    """
+    if pd.Timestamp(as_of) >= engine.returns.index.max():
+        corr = pd.DataFrame(engine.rolling(window).corr() * 100, index=engine.returns.columns, columns=engine.returns.columns)
+    else:
+        corr = rolling_corr_matrix(engine.returns, as_of, window)
+    return top_pairs(corr, k)
+
+def panel_correlation(panel, price_col='close', start=None, end=None, progress=None):
+    """
+    CorrelationEngine over a PricePanel for a date range, with its correlation matrix computed.
+    Run as a background job (utils.jobs), which also keeps it per parameter set.
+    """
+    if progress:
+        progress(0.05, "Building returns matrix")
+    live = live_source(panel)
+    if live is not None and start is None and end is None:
+        # Whole history of a store-backed panel: each new version's bars are folded into a copy
+        # of the previous engine (others may still be reading it) rather than recomputed
+        engine = live.derived(
+            ('correlation', price_col),
+            lambda p: CorrelationEngine.from_frame(p.frame, price_col),
+            lambda e, bars, p: copy.deepcopy(e).append(bars, price_col),
+        )
+    else:
+        engine = CorrelationEngine.from_frame(panel.frame, price_col, start, end)
+    if progress:
+        progress(0.6, "Correlating")
+    engine.corr  # computed here, off the script thread
+    return engine
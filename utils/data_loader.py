@@ -1,9 +1,129 @@
 import streamlit as st
 import pandas as pd
-import io
+import pyarrow as pa
+import pyarrow.feather as feather
+import hashlib
+import json
+import os
+from utils.panel import PricePanel
+from utils.ingest import UploadError, ingest_upload
+from utils.price_store import PriceStore, live_store
 
-@st.cache_data
-def load_default(path='uploaded_files/all_stocks.csv'):
+DEFAULT_PATH = 'uploaded_files/all_stocks.csv'
+
+def file_fingerprint(path):
+    """Cheap change marker for a source file: (size, mtime_ns)."""
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+def content_digest(path, block=1 << 20):
+    """Hash of the whole file, read in blocks; survives touch/copy, unlike file_fingerprint."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        while chunk := f.read(block):
+            h.update(chunk)
+    return h.hexdigest()
+
+def cache_path(path):
+    return os.path.splitext(path)[0] + '.arrow'
+
+def store_path(path):
+    """Price store that replaces path when present (see utils.price_store)."""
+    return os.path.splitext(path)[0] + '.sqlite'
+
+def source_fingerprint(path=DEFAULT_PATH):
+    """Cheap change marker for the prices behind path: the store's version, else the file's fingerprint."""
+    if os.path.exists(store_path(path)):
+        return ('store', PriceStore(store_path(path)).version)
+    return file_fingerprint(path)
+
+def source_digest(path=DEFAULT_PATH):
+    """Content identity of the prices behind path, for matching precomputed reports."""
+    if os.path.exists(store_path(path)):
+        store = PriceStore(store_path(path))
+        log = store.changes(store.version - 1)
+        return f"store:{store.version}:{log['created'].iloc[-1] if len(log) else ''}"
+    return content_digest(path)
+
+def read_columnar_cache(path):
+    """Load the typed Arrow cache next to path if it was built from the current file, else None."""
+    cpath = cache_path(path)
+    if not os.path.exists(cpath):
+        return None
+    try:
+        table = feather.read_table(cpath, memory_map=True)
+        meta = json.loads(table.schema.metadata[b'source'])
+    except (OSError, KeyError, ValueError, pa.ArrowException):
+        return None
+    # Any size or mtime change invalidates: an edit can keep the size and only touch the middle
+    if (meta['size'], meta['mtime_ns']) != file_fingerprint(path):
+        return None
+    df = table.to_pandas()
+    df['date'] = pd.to_datetime(df['date'], unit='ns')
+    return df.set_index('date')
+
+def write_columnar_cache(df, path):
+    """Materialize df (as returned by load_default) as an uncompressed, memory-mappable Arrow file."""
+    size, mtime = file_fingerprint(path)
+    out = df.reset_index()
+    out['date'] = out['date'].to_numpy().astype('datetime64[ns]').astype('int64')
+    out['stock'] = out['stock'].astype('category')
+    table = pa.Table.from_pandas(out, preserve_index=False)
+    meta = {'size': size, 'mtime_ns': mtime}
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), b'source': json.dumps(meta).encode()})
+    tmp = cache_path(path) + '.tmp'
+    try:
+        feather.write_feather(table, tmp, compression='uncompressed')
+        os.replace(tmp, cache_path(path))
+    except OSError:
+        pass  # read-only data dir: just run without the cache
+
+USER_FILE_PREFIX = "User File: "
+
+def dataset_options(panel, custom_dfs):
+    """Selectbox options: default tickers followed by uploaded files."""
+    return panel.tickers + [f"{USER_FILE_PREFIX}{n}" for n, _ in custom_dfs]
+
+def get_series(panel, custom_dfs, selected):
+    """History for one dataset option: an O(1) row-range slice of the panel, or the uploaded frame."""
+    if selected.startswith(USER_FILE_PREFIX):
+        return dict(custom_dfs).get(selected[len(USER_FILE_PREFIX):])
+    return panel.view(selected)
+
+def load_default(path=DEFAULT_PATH):
+    return _load_default(path, file_fingerprint(path))
+
+@st.cache_data(max_entries=1)
+def _load_default(path, fingerprint):
+    df = _read_default(path)
+    df['stock'] = df['stock'].astype(str)
+    return df
+
+def load_panel(path=DEFAULT_PATH, compact=False):
+    """
+    Shared PricePanel over path. Held with cache_resource, so every session and rerun
+    gets the same object instead of the per-call copy cache_data hands out. When a price
+    store sits next to path the panel comes from it, with new versions spliced in.
+    """
+    if os.path.exists(store_path(path)):
+        live = live_store(store_path(path), compact)
+        if live.panel is None:
+            with st.spinner("Loading prices..."):
+                return live.refresh()
+        return live.refresh()
+    return _load_panel(path, file_fingerprint(path), compact)
+
+@st.cache_resource(max_entries=2, show_spinner="Loading prices...")
+def _load_panel(path, fingerprint, compact):
+    df = _read_default(path)
+    if not compact:
+        df['stock'] = df['stock'].astype(str)
+    return PricePanel.from_frame(df, compact=compact, fingerprint=(path, fingerprint, compact))
+
+def _read_default(path):
+    df = read_columnar_cache(path)
+    if df is not None:
+        return df
     df = pd.read_csv(path, parse_dates=['date'])
     df.columns = df.columns.str.lower()
     df.dropna(subset=['stock'], inplace=True)
@@ -11,24 +131,25 @@ def load_default(path='uploaded_files/all_stocks.csv'):
     df['date'] = pd.to_datetime(df['date'])
     df.sort_values(['stock','date'], inplace=True)
     df.set_index('date', inplace=True)
+    write_columnar_cache(df, path)
     return df
 
-@st.cache_data
 def load_custom(files):
+    """Ingest uploads with utils.ingest (chunked, size-limited, cached by content digest)."""
     dfs = []
     for file in files:
-        raw = file.read()
-        if file.name.lower().endswith('.csv'):
-            df = pd.read_csv(io.BytesIO(raw))
-        else:
-            df = pd.read_excel(io.BytesIO(raw))
-        df.columns = df.columns.str.lower()
-        if 'date' not in df.columns:
-            st.error(f"❌ {file.name} must contain a 'date' column.")
+        bars = []   # created on the first progress call, i.e. only when the upload is parsed
+        def report(f, name=file.name, bars=bars):
+            if not bars:
+                bars.append(st.progress(0.0, text=f"Reading {name}"))
+            bars[0].progress(f, text=f"Reading {name}")
+        try:
+            df = ingest_upload(file, progress=report)
+        except UploadError as e:
+            st.error(f"❌ {e}")
             continue
-        df['date'] = pd.to_datetime(df['date'], errors='coerce')
-        df.dropna(subset=['date'], inplace=True)
-        df.sort_values('date', inplace=True)
-        df.set_index('date', inplace=True)
+        finally:
+            for bar in bars:
+                bar.empty()
         dfs.append((file.name, df))
     return dfs
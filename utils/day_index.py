@@ -0,0 +1,222 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+import calendar
+import os
+from utils.data_loader import DEFAULT_PATH, file_fingerprint, load_panel, store_path
+from utils.price_store import live_store
+from utils.result_cache import cached, dataset_key
+from utils.screener import SCREENER_COLUMNS
+from utils.computations import MONTHLY_COLUMNS
+
+# Day-of-year on a leap calendar so Feb 29 always has a slot: Jan 1 -> 0, Dec 31 -> 365
+DAYS = 366
+MONTH_DAYS = np.array([calendar.monthrange(2000, m)[1] for m in range(1, 13)])
+MONTH_START = np.concatenate([[0], np.cumsum(MONTH_DAYS)[:-1]])
+
+def day_of_year(month, day):
+    return MONTH_START[np.asarray(month) - 1] + np.asarray(day) - 1
+
+class DayIndex:
+    """
+    Dense (stock x year x day-of-year) index over a price panel.
+    first_idx[s, y, d] / last_idx[s, y, d] hold the row of the first close on or after /
+    last close on or before day d of that year (-1 if none), so any MM/DD window is two gathers.
+    """
+
+    def __init__(self, tickers, years, close, month, first_idx, last_idx, fingerprint=None, dates=None):
+        self.tickers = tickers
+        self.years = years
+        self.close = close
+        self.month = month
+        self.dates = dates  # int64 ns per row, for reporting trade dates
+        self.first_idx = first_idx
+        self.last_idx = last_idx
+        self.fingerprint = fingerprint
+        self._codes = {t: i for i, t in enumerate(tickers)}
+
+    @classmethod
+    def build(cls, df, price_col='close', stock_col='stock', fingerprint=None):
+        dates = df.index if isinstance(df.index, pd.DatetimeIndex) else pd.DatetimeIndex(pd.to_datetime(df['date'], errors='coerce'))
+        close = pd.to_numeric(df[price_col], errors='coerce').to_numpy(dtype='float64')
+        valid = ~np.isnan(close) & ~np.isnat(dates.to_numpy())
+        dates, close, stocks = dates[valid], close[valid], df[stock_col].to_numpy()[valid]
+        codes, tickers = pd.factorize(stocks, sort=True)
+        order = np.lexsort((dates.asi8, codes))
+        dates, close, codes = dates[order], close[order], codes[order].astype('int64')
+
+        years = np.arange(dates.year.min(), dates.year.max() + 1) if len(dates) else np.array([], dtype=int)
+        n_stocks, n_years = len(tickers), len(years)
+        month = dates.month.to_numpy().astype('int8')
+        flat = (codes * n_years + (dates.year.to_numpy() - (years[0] if n_years else 0))) * DAYS \
+            + day_of_year(month, dates.day.to_numpy())
+
+        # Rows are sorted by (stock, date) so flat is non-decreasing: keep first/last row per trading day
+        rows = np.arange(len(flat), dtype='int32')
+        is_last = np.append(flat[1:] != flat[:-1], True)
+        is_first = np.insert(flat[1:] != flat[:-1], 0, True)
+
+        last_idx = np.full(n_stocks * n_years * DAYS, -1, dtype='int32')
+        last_idx[flat[is_last]] = rows[is_last]
+        last_idx = np.maximum.accumulate(last_idx.reshape(-1, DAYS), axis=1)
+
+        none = np.iinfo('int32').max
+        first_idx = np.full(n_stocks * n_years * DAYS, none, dtype='int32')
+        first_idx[flat[is_first]] = rows[is_first]
+        first_idx = np.minimum.accumulate(first_idx.reshape(-1, DAYS)[:, ::-1], axis=1)[:, ::-1]
+        first_idx = np.where(first_idx == none, -1, first_idx).astype('int32')
+
+        shape = (n_stocks, n_years, DAYS)
+        return cls(list(tickers), years, close, month, first_idx.reshape(shape), last_idx.reshape(shape), fingerprint, dates.as_unit('ns').asi8)
+
+    @classmethod
+    def for_series(cls, df, name, price_col='close', fingerprint=None):
+        """Single-ticker index over an uploaded frame (no stock column)."""
+        if fingerprint is None:
+            fingerprint = (name, len(df), int(pd.util.hash_pandas_object(df[price_col]).sum()))
+        return cls.build(df.assign(stock=name), price_col, fingerprint=fingerprint)
+
+    def append(self, bars, price_col='close', stock_col='stock', fingerprint=None):
+        """
+        Index with bars added after each ticker's last indexed day. Rows are re-laid out so each
+        ticker's stay one contiguous, date-ordered run (as build() lays them out; range scans such as
+        the backtester's drawdown rely on it); only the (stock, year) slabs the bars fall in change.
+        Raises ValueError for earlier bars.
+        """
+        new = DayIndex.build(bars, price_col, stock_col)
+        if not len(new.close):
+            return self
+        if not len(self.close):
+            return DayIndex.build(bars, price_col, stock_col, fingerprint)
+        tickers = sorted(set(self.tickers) | set(new.tickers))
+        old_s, new_s = np.searchsorted(tickers, self.tickers), np.searchsorted(tickers, new.tickers)
+        old_start, old_stop = self._row_ranges()
+        new_start, new_stop = new._row_ranges()
+        seen = np.full(len(tickers), np.iinfo('int64').min)
+        seen[old_s] = self.dates[old_stop - 1]
+        if (new.dates[new_start] <= seen[new_s]).any():
+            raise ValueError("bars must come after each ticker's last indexed day")
+
+        # Each ticker's block is its old rows followed by its new ones
+        n_old, n_new = np.zeros(len(tickers), 'int64'), np.zeros(len(tickers), 'int64')
+        n_old[old_s], n_new[new_s] = old_stop - old_start, new_stop - new_start
+        block = np.concatenate([[0], np.cumsum(n_old + n_new)[:-1]])
+        old_map = (np.arange(len(self.close)) + np.repeat(block[old_s] - old_start, n_old[old_s])).astype('int32')
+        new_map = (np.arange(len(new.close)) + np.repeat(block[new_s] + n_old[new_s] - new_start, n_new[new_s])).astype('int32')
+        size = len(self.close) + len(new.close)
+        close, month, dates = np.empty(size), np.empty(size, self.month.dtype), np.empty(size, 'int64')
+        for out, old, add in ((close, self.close, new.close), (month, self.month, new.month), (dates, self.dates, new.dates)):
+            out[old_map], out[new_map] = old, add
+
+        years = np.arange(min(self.years[0], new.years[0]), max(self.years[-1], new.years[-1]) + 1)
+        first_idx = np.full((len(tickers), len(years), DAYS), -1, dtype='int32')
+        last_idx = np.full((len(tickers), len(years), DAYS), -1, dtype='int32')
+        y0 = self.years[0] - years[0]
+        first_idx[old_s, y0:y0 + len(self.years)] = np.where(self.first_idx >= 0, old_map[np.maximum(self.first_idx, 0)], -1)
+        last_idx[old_s, y0:y0 + len(self.years)] = np.where(self.last_idx >= 0, old_map[np.maximum(self.last_idx, 0)], -1)
+        # Within a slab old rows precede new ones: the first close on/after d is an old one if any
+        # exists, the last on/before d a new one if any exists
+        y0 = new.years[0] - years[0]
+        ys = slice(y0, y0 + len(new.years))
+        f, l = first_idx[new_s, ys], last_idx[new_s, ys]
+        first_idx[new_s, ys] = np.where(f >= 0, f, np.where(new.first_idx >= 0, new_map[np.maximum(new.first_idx, 0)], -1))
+        last_idx[new_s, ys] = np.where(new.last_idx >= 0, new_map[np.maximum(new.last_idx, 0)], l)
+        return DayIndex(tickers, years, close, month, first_idx, last_idx, fingerprint, dates)
+
+    def _row_ranges(self):
+        """Per ticker, the [start, stop) of its contiguous rows."""
+        n = len(self.tickers)
+        first = np.where(self.first_idx >= 0, self.first_idx, len(self.close)).reshape(n, -1).min(axis=1)
+        return first, self.last_idx.reshape(n, -1).max(axis=1) + 1
+
+    def code(self, stock):
+        return self._codes[stock]
+
+    def price_at(self, rows, valid=True):
+        """Close at each row position; NaN where the position is -1 or not valid."""
+        return np.where(valid & (rows >= 0), self.close[np.maximum(rows, 0)], np.nan)
+
+    def in_month(self, rows, month):
+        return (rows >= 0) & (self.month[np.maximum(rows, 0)] == month)
+
+    def _prices(self, first, last, valid=True):
+        ok = valid & (first >= 0) & (last >= 0)
+        return self.price_at(first, ok), self.price_at(last, ok)
+
+    def window_returns(self, start_md, end_md, stocks=None):
+        """(stock x year) returns of the first trading >= start_md to last trading <= end_md."""
+        sel = slice(None) if stocks is None else [self._codes[s] for s in stocks]
+        first = self.first_idx[sel, :, day_of_year(*start_md)]
+        last = self.last_idx[sel, :, day_of_year(*end_md)]
+        p0, p1 = self._prices(first, last)
+        return (p1 / p0 - 1) * 100
+
+    def screen(self, start_md, end_md):
+        """Screener table (same columns as utils.screener.screen_universe) for the whole index."""
+        ret = self.window_returns(start_md, end_md)
+        n = (~np.isnan(ret)).sum(axis=1)
+        keep = n > 0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out = pd.DataFrame({
+                'Ticker': np.asarray(self.tickers, dtype=object),
+                'Avg Return (%)': np.nansum(ret, axis=1) / n,
+                'Positive Ratio (%)': (ret > 0).sum(axis=1) / n * 100,
+                'Negative Ratio (%)': (ret < 0).sum(axis=1) / n * 100,
+            })
+        return out[keep].reset_index(drop=True)[SCREENER_COLUMNS]
+
+    def monthly_window_returns(self, start_day, end_day, stocks=None):
+        """(stock x year x month) returns from first close with day >= start_day to last with day <= end_day."""
+        sel = slice(None) if stocks is None else [self._codes[s] for s in stocks]
+        months = np.arange(1, 13)
+        in_month = start_day <= MONTH_DAYS
+        d0 = np.where(in_month, day_of_year(months, np.minimum(start_day, MONTH_DAYS)), 0)
+        d1 = day_of_year(months, np.minimum(end_day, MONTH_DAYS))
+        first, last = self.first_idx[sel][:, :, d0], self.last_idx[sel][:, :, d1]
+        valid = in_month & (self.month[np.maximum(first, 0)] == months) & (self.month[np.maximum(last, 0)] == months)
+        p0, p1 = self._prices(first, last, valid)
+        return (p1 - p0) / p0 * 100
+
+    def monthly_table(self, start_day, end_day, stocks=None):
+        """compute_monthly_returns for many tickers at once (Stock column first), from the dense arrays."""
+        ret = self.monthly_window_returns(start_day, end_day, stocks)
+        n = (~np.isnan(ret)).sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            stats = [np.nansum(ret, axis=1) / n, (ret > 0).sum(axis=1) / n * 100, (ret < 0).sum(axis=1) / n * 100]
+        tickers = np.asarray(self.tickers if stocks is None else stocks, dtype=object)
+        s, m = np.nonzero(n > 0)
+        out = pd.DataFrame({
+            'Stock': tickers[s],
+            'Month': np.asarray(calendar.month_abbr, dtype=object)[m + 1],
+            **{c: v[s, m] for c, v in zip(MONTHLY_COLUMNS[1:], stats)},
+        })
+        return out.round(2)
+
+    def monthly_returns(self, stock, start_day, end_day):
+        """compute_monthly_returns for a ticker in the index, answered from the dense arrays."""
+        return self.monthly_table(start_day, end_day, [stock])[MONTHLY_COLUMNS]
+
+@cached('series_day_index')
+def series_day_index(df, name, price_col='close'):
+    """DayIndex.for_series built once per dataset, fingerprinted by its dataset key instead of a content hash."""
+    return DayIndex.for_series(df, name, price_col, fingerprint=('series', dataset_key(df), name))
+
+@st.cache_resource(max_entries=1, show_spinner="Indexing prices...")
+def _load_day_index(path, fingerprint, compact):
+    return DayIndex.build(load_panel(path, compact).frame, fingerprint=(path, fingerprint, compact))
+
+def load_day_index(path=DEFAULT_PATH, compact=False):
+    """
+    DayIndex over the default price panel; rebuilt only when the file's fingerprint changes.
+    Over a price store it is extended with each new version's bars instead. None when the data
+    has no close column: the tabs then use their per-frame paths, which detect the price column.
+    """
+    if 'close' not in load_panel(path, compact).frame.columns:
+        return None
+    if os.path.exists(store_path(path)):
+        return live_store(store_path(path), compact).derived(
+            'day_index',
+            lambda panel: DayIndex.build(panel.frame, fingerprint=panel.fingerprint),
+            lambda index, bars, panel: index.append(bars, fingerprint=panel.fingerprint),
+        )
+    return _load_day_index(path, file_fingerprint(path), compact)
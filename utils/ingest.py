@@ -0,0 +1,107 @@
+import hashlib
+import os
+import pandas as pd
+from utils.result_cache import RESULTS, register_dataset
+
+MAX_UPLOAD_BYTES = int(float(os.environ.get('RA_MAX_UPLOAD_MB', 200)) * 2**20)
+CHUNK_ROWS = 250_000
+SAMPLE_ROWS = 1_000
+
+# (file_id, name, size) -> content digest. An UploadedFile's file_id is new for every upload, so
+# a remembered digest stays valid and reruns skip reading and hashing the file again
+_DIGESTS = {}
+MAX_DIGESTS = 256
+
+class UploadError(ValueError):
+    """An upload that cannot be ingested (too large, no date column, unparseable)."""
+
+def upload_digest(file, max_bytes=MAX_UPLOAD_BYTES, block=1 << 20):
+    """Content digest of an upload, read in blocks; raises UploadError once max_bytes is exceeded."""
+    size = getattr(file, 'size', None)
+    if size is not None and size > max_bytes:
+        raise UploadError(f"{file.name} is {size / 2**20:.1f} MB; the limit is {max_bytes / 2**20:.1f} MB.")
+    h, total = hashlib.blake2b(digest_size=16), 0
+    file.seek(0)
+    while chunk := file.read(block):
+        total += len(chunk)
+        if total > max_bytes:
+            raise UploadError(f"{file.name} exceeds the {max_bytes / 2**20:.1f} MB upload limit.")
+        h.update(chunk)
+    file.seek(0)
+    return h.hexdigest()
+
+def _known_digest(file, max_bytes):
+    file_id = getattr(file, 'file_id', None)
+    if file_id is None:
+        return upload_digest(file, max_bytes)
+    key = (file_id, file.name, getattr(file, 'size', None))
+    if key not in _DIGESTS:
+        digest = upload_digest(file, max_bytes)
+        while len(_DIGESTS) >= MAX_DIGESTS:
+            _DIGESTS.pop(next(iter(_DIGESTS)))
+        _DIGESTS[key] = digest
+    return _DIGESTS[key]
+
+def _sample_dtypes(sample):
+    """Parse dtypes from a sample: floats as float32, ints as float64 (NaN-safe), text as category."""
+    dtypes = {}
+    for col in sample.columns:
+        if col.strip().lower() == 'date':
+            continue
+        kind = sample[col].dtype.kind
+        dtypes[col] = 'float32' if kind == 'f' else 'float64' if kind in 'iub' else 'category'
+    return dtypes
+
+def _normalize(df):
+    df.columns = df.columns.str.lower()
+    df['date'] = pd.to_datetime(df['date'], errors='coerce')
+    return df.dropna(subset=['date'])
+
+def _read_csv(file, chunksize, progress):
+    sample = pd.read_csv(file, nrows=SAMPLE_ROWS)
+    if 'date' not in sample.columns.str.lower():
+        raise UploadError(f"{file.name} must contain a 'date' column.")
+    dtypes = _sample_dtypes(sample)
+    total = max(getattr(file, 'size', 0) or 1, 1)
+    file.seek(0)
+    chunks = []
+    try:
+        for chunk in pd.read_csv(file, chunksize=chunksize, dtype=dtypes):
+            chunks.append(_normalize(chunk))
+            if progress:
+                progress(min(file.tell() / total, 1.0))
+    except (ValueError, TypeError) as e:
+        raise UploadError(f"{file.name}: a column doesn't match the type seen in its first rows ({e}).") from e
+    df = pd.concat(chunks, ignore_index=True) if chunks else _normalize(sample.iloc[:0])
+    # Chunks each carry their own categories; unify them once
+    for col, dtype in dtypes.items():
+        if dtype == 'category':
+            df[col.lower()] = df[col.lower()].astype(str).astype('category')
+    return df
+
+def _read_excel(file, progress):
+    df = pd.read_excel(file)
+    if 'date' not in df.columns.str.lower():
+        raise UploadError(f"{file.name} must contain a 'date' column.")
+    df = _normalize(df).astype({c: 'float32' for c in df.columns if c != 'date' and df[c].dtype.kind == 'f'})
+    if progress:
+        progress(1.0)
+    return df
+
+def ingest_upload(file, max_bytes=MAX_UPLOAD_BYTES, chunksize=CHUNK_ROWS, progress=None):
+    """
+    Parse an uploaded CSV/Excel file into a date-indexed, compact frame. CSVs are read in chunks
+    with dtypes taken from a sample; the result is cached and dataset-keyed by content digest,
+    and the digest is remembered per upload, so reruns neither re-read nor re-hash the file.
+    progress(fraction) is called only while parsing.
+    """
+    digest = _known_digest(file, max_bytes)
+    is_csv = file.name.lower().endswith('.csv')
+
+    def parse():
+        file.seek(0)
+        df = _read_csv(file, chunksize, progress) if is_csv else _read_excel(file, progress)
+        return df.sort_values('date', kind='stable').set_index('date')
+
+    # Re-register every time: a frame served from the disk tier is a fresh object
+    return register_dataset(RESULTS.get_or_compute(('upload', digest, is_csv), parse), ('upload', digest))
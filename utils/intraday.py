@@ -0,0 +1,97 @@
+import pandas as pd
+import numpy as np
+from utils.computations import WEEKDAYS, period_bounds
+from utils.result_cache import cached, dataset_key, register_dataset
+
+CHUNK_ROWS = 1_000_000
+BUCKETS = ['15min', '30min', '60min']
+GRID_COLUMNS = ['Weekday', 'Time', 'Avg Return (%)', 'Positive Ratio (%)', 'Negative Ratio (%)', 'Observations']
+
+def is_intraday(df):
+    """True if some calendar day has several bars (a multi-ticker frame is not intraday)."""
+    idx = df.index
+    if not isinstance(idx, pd.DatetimeIndex) or len(idx) < 2:
+        return False
+    if 'stock' in df.columns and df['stock'].nunique() > 1:
+        return False
+    return bool(idx.normalize().has_duplicates)
+
+def iter_chunks(bars, rows=CHUNK_ROWS):
+    """A frame as consecutive row chunks, or pass an iterable of chunks straight through."""
+    if isinstance(bars, pd.DataFrame):
+        for lo in range(0, len(bars), rows):
+            yield bars.iloc[lo:lo + rows]
+    else:
+        yield from bars
+
+# Per-group first/last/max/min/sum are associative, so chunk partials combine exactly
+_OHLCV = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
+
+def _combine(partials):
+    parts = pd.concat(partials)
+    aggs = {c: f for c, f in _OHLCV.items() if c in parts.columns}
+    return parts.groupby(level=list(range(parts.index.nlevels)), sort=True).agg(aggs)
+
+def resample_daily(bars, rows=CHUNK_ROWS):
+    """
+    Daily OHLC(V) from time-ordered intraday bars, aggregated chunk by chunk so only one chunk of
+    bars plus one partial row per day is held at a time.
+    """
+    partials = []
+    for chunk in iter_chunks(bars, rows):
+        aggs = {c: f for c, f in _OHLCV.items() if c in chunk.columns}
+        partials.append(chunk.groupby(chunk.index.normalize()).agg(aggs))
+    if not partials:
+        return pd.DataFrame(columns=list(_OHLCV))
+    return _combine(partials).rename_axis('date')
+
+def weekday_time_returns(bars, start_period, end_period, bucket='30min', rows=CHUNK_ROWS):
+    """
+    Per (day, time bucket) open->close return (%) over the selected months, built from chunk
+    partials: first open and last close per (day, bucket) combine exactly across chunk boundaries.
+    """
+    start, end = period_bounds(start_period, end_period)
+    width = pd.Timedelta(bucket)
+    partials = []
+    for chunk in iter_chunks(bars, rows):
+        idx = chunk.index
+        chunk = chunk.loc[(idx >= start) & (idx < end), ['open', 'close']]
+        if chunk.empty:
+            continue
+        day = chunk.index.normalize()
+        slot = (chunk.index - day) // width
+        partials.append(chunk.groupby([day, slot]).agg({'open': 'first', 'close': 'last'}).rename_axis(['day', 'slot']))
+    if not partials:
+        return pd.DataFrame(columns=['day', 'slot', 'return'])
+    win = _combine(partials).reset_index()
+    win['return'] = (win['close'] - win['open']) / win['open'] * 100
+    return win[['day', 'slot', 'return']]
+
+@cached('weekday_time_grid')
+def weekday_time_grid(bars, start_period, end_period, bucket='30min'):
+    """Weekday x time-of-day grid of average bucket return and hit ratios (long format)."""
+    win = weekday_time_returns(bars, start_period, end_period, bucket)
+    win = win[win['day'].dt.dayofweek < 5] if len(win) else win
+    if win.empty:
+        return pd.DataFrame(columns=GRID_COLUMNS)
+    grp = win.groupby([win['day'].dt.dayofweek.rename('wd'), 'slot'])['return']
+    out = pd.DataFrame({
+        'Avg Return (%)': grp.mean(),
+        'Positive Ratio (%)': grp.apply(lambda r: (r > 0).mean() * 100),
+        'Negative Ratio (%)': grp.apply(lambda r: (r < 0).mean() * 100),
+        'Observations': grp.size(),
+    }).round(2).reset_index()
+    width = pd.Timedelta(bucket)
+    out['Weekday'] = np.asarray(WEEKDAYS, dtype=object)[out['wd']]
+    out['Time'] = [f"{t.components.hours:02d}:{t.components.minutes:02d}" for t in out['slot'] * width]
+    return out[GRID_COLUMNS]
+
+def grid_matrix(grid, value='Avg Return (%)'):
+    """(weekday x time) matrix of a weekday_time_grid, weekdays in calendar order."""
+    mat = grid.pivot(index='Weekday', columns='Time', values=value)
+    return mat.reindex(index=[w for w in WEEKDAYS if w in mat.index])
+
+@cached('daily_bars')
+def daily_bars(bars):
+    """resample_daily, cached and registered so weekday computations on it get a cheap key."""
+    return register_dataset(resample_daily(bars), ('daily', dataset_key(bars)))
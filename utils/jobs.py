@@ -0,0 +1,119 @@
+import streamlit as st
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from utils.result_cache import nbytes
+
+class Job:
+    """A background computation: status is 'running', 'done' or 'error'; progress is 0..1."""
+
+    def __init__(self, key):
+        self.key = key
+        self.status = 'running'
+        self.progress = 0.0
+        self.message = "Starting..."
+        self.result = None
+        self.nbytes = 0
+        self.error = None
+        self.started = time.time()
+        self.finished = None
+        self._done = threading.Event()
+
+    def report(self, fraction, message=None):
+        """Progress callback handed to the job's function."""
+        self.progress = min(max(float(fraction), 0.0), 1.0)
+        if message:
+            self.message = message
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    @property
+    def seconds(self):
+        return (self.finished or time.time()) - self.started
+
+class JobManager:
+    """
+    Runs heavy view computations on worker threads, one job per key (view + parameters).
+    Finished jobs double as a small LRU result cache, bounded by count and by the bytes of their
+    results, so returning to earlier parameters is instant.
+    """
+
+    def __init__(self, workers=2, keep=8, max_bytes=256 * 2**20):
+        self.keep = keep
+        self.max_bytes = max_bytes
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ra-job')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, key, fn, *args, **kwargs):
+        """The job for key, started if new (or if its last run failed); fn gets progress= as a keyword."""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.status != 'error':
+                self._jobs.move_to_end(key)
+                return job
+            job = self._jobs[key] = Job(key)
+            self._trim()
+        self._pool.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, key):
+        return self._jobs.get(key)
+
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def _run(self, job, fn, args, kwargs):
+        try:
+            job.result = fn(*args, progress=job.report, **kwargs)
+            job.nbytes = nbytes(job.result)
+            job.report(1.0, "Done")
+            job.status = 'done'
+        except Exception as e:  # surfaced in the view that asked for it
+            job.error = e
+            job.status = 'error'
+        finally:
+            job.finished = time.time()
+            job._done.set()
+            with self._lock:
+                self._trim()
+
+    def _trim(self):
+        # Oldest finished jobs go first; the most recently used one stays even when over budget,
+        # or the view asking for it would resubmit it on every rerun
+        done = [k for k, j in self._jobs.items() if j.status != 'running'][:-1]
+        total = sum(j.nbytes for j in self._jobs.values())
+        for k in done:
+            if len(self._jobs) <= self.keep and total <= self.max_bytes:
+                break
+            total -= self._jobs.pop(k).nbytes
+
+@st.cache_resource
+def job_manager():
+    """Process-wide JobManager shared by every session; RA_JOB_MB bounds the results it keeps."""
+    return JobManager(max_bytes=int(float(os.environ.get('RA_JOB_MB', 256)) * 2**20))
+
+def job_result(job, label, wait=0.25, poll=0.5):
+    """
+    The job's result once done. Quick jobs are waited for (up to `wait` seconds); otherwise show
+    progress (polled in a fragment, so the rest of the page stays interactive) and rerun the app
+    when it finishes, returning None meanwhile.
+    """
+    job.wait(wait)
+    if job.status == 'done':
+        return job.result
+    if job.status == 'error':
+        st.error(f"{label} failed: {job.error}")
+        return None
+
+    @st.fragment(run_every=poll)
+    def progress():
+        if job.status != 'running':
+            st.rerun()
+        st.progress(job.progress, text=f"{label}: {job.message} ({job.seconds:.0f}s)")
+    progress()
+    return None
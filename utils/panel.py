@@ -0,0 +1,66 @@
+import pandas as pd
+import numpy as np
+from utils.result_cache import register_dataset
+
+def stock_slices(frame, stock_col='stock'):
+    """Ordered ticker -> (start, stop) row ranges of a frame sorted by stock."""
+    codes, tickers = pd.factorize(frame[stock_col], sort=True)
+    if len(codes) and (np.diff(codes) < 0).any():
+        raise ValueError("frame must be sorted by stock")
+    bounds = np.searchsorted(codes, np.arange(len(tickers) + 1))
+    return {t: (int(bounds[i]), int(bounds[i + 1])) for i, t in enumerate(tickers)}
+
+class PricePanel:
+    """
+    Multi-ticker price frame sorted by (stock, date) plus an offset table of each
+    ticker's contiguous row range, so selecting a ticker is a slice rather than a mask.
+    """
+
+    def __init__(self, frame, fingerprint=None, stamps=None):
+        self.frame = frame
+        self.fingerprint = fingerprint
+        self.stamps = stamps  # store-backed panels: ticker -> version of its newest bars
+        self.slices = stock_slices(frame)
+        self.tickers = list(self.slices)
+        self.starts = np.array([a for a, _ in self.slices.values()], dtype='int64')
+        self.stops = np.array([b for _, b in self.slices.values()], dtype='int64')
+        self._codes = {t: i for i, t in enumerate(self.tickers)}
+        if fingerprint is not None:
+            register_dataset(frame, ('panel', fingerprint))
+
+    @classmethod
+    def from_frame(cls, df, compact=False, fingerprint=None, stamps=None):
+        """Wrap a load_default-style frame; compact=True int-codes tickers and stores prices as float32."""
+        if compact:
+            df = df.astype({
+                'stock': 'category',
+                **{c: 'float32' for c in df.columns if c != 'stock' and pd.api.types.is_float_dtype(df[c])},
+            })
+        return cls(df, fingerprint, stamps)
+
+    def __len__(self):
+        return len(self.frame)
+
+    def __contains__(self, stock):
+        return stock in self._codes
+
+    @property
+    def nbytes(self):
+        return int(self.frame.memory_usage(index=True, deep=True).sum())
+
+    def code(self, stock):
+        return self._codes[stock]
+
+    def rows(self, stock):
+        return slice(*self.slices[stock])
+
+    def view(self, stock):
+        """Rows of one ticker without the stock column; a slice of the shared frame, not a copy."""
+        view = self.frame.iloc[self.rows(stock)].drop(columns=['stock'])
+        if self.stamps is not None:
+            # Keyed by the ticker's own version (the fingerprint minus its trailing store version),
+            # so an append leaves cached results of the tickers it didn't touch valid
+            register_dataset(view, ('panel', self.fingerprint[:-1], stock, self.stamps[stock]))
+        elif self.fingerprint is not None:
+            register_dataset(view, ('panel', self.fingerprint, stock))
+        return view
@@ -0,0 +1,143 @@
+import os
+import calendar
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from utils.computations import compute_monthly_returns, compute_seasonality_heatmap, compute_weekday_returns
+from utils.screener import screen_universe
+
+def default_workers():
+    """Worker count from RA_WORKERS, else one per core."""
+    return max(1, int(os.environ.get('RA_WORKERS', os.cpu_count() or 1)))
+
+def _uncached(fn):
+    # Inside workers call the plain function; the ResultCache lives in the worker process, so caching
+    # there would only key and store a throwaway copy
+    return getattr(fn, '__wrapped__', fn)
+
+def shard_bounds(panel, n_shards):
+    """Split the panel's tickers into contiguous row ranges of roughly equal row counts."""
+    if not len(panel.tickers):
+        return []
+    n_shards = max(1, min(n_shards, len(panel.tickers)))
+    targets = np.arange(1, n_shards) * len(panel) / n_shards
+    cuts = np.unique(np.searchsorted(panel.stops, targets, side='left'))
+    edges = np.concatenate([[0], panel.stops[cuts[cuts < len(panel.tickers) - 1]], [len(panel)]])
+    return [(int(a), int(b)) for a, b in zip(edges[:-1], edges[1:]) if b > a]
+
+class SharedPanel:
+    """
+    Numeric columns, date index and int-coded tickers of a panel copied once into shared memory.
+    Workers map them back as a DataFrame, so tasks only carry (start, stop) row ranges.
+    """
+
+    def __init__(self, panel):
+        frame = panel.frame
+        codes, tickers = pd.factorize(frame['stock'], sort=True)
+        arrays = {'__date__': frame.index.to_numpy().astype('datetime64[ns]').view('int64'), '__code__': codes.astype('int32')}
+        arrays.update({c: frame[c].to_numpy() for c in frame.columns if c != 'stock' and pd.api.types.is_numeric_dtype(frame[c])})
+        self.blocks, self.spec = [], {'tickers': list(tickers), 'index_name': frame.index.name, 'columns': []}
+        for name, arr in arrays.items():
+            arr = np.ascontiguousarray(arr)
+            shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+            np.ndarray(arr.shape, arr.dtype, buffer=shm.buf)[:] = arr
+            self.blocks.append(shm)
+            self.spec['columns'].append((name, shm.name, arr.dtype.str, arr.shape))
+
+    def close(self):
+        for shm in self.blocks:
+            shm.close()
+            shm.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+_WORKER = {}
+
+def _attach(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13: workers share the parent's resource tracker, which unlinks once
+        return shared_memory.SharedMemory(name=name)
+
+def _init_worker(spec):
+    blocks, cols = [], {}
+    for name, shm_name, dtype, shape in spec['columns']:
+        shm = _attach(shm_name)
+        blocks.append(shm)
+        cols[name] = np.ndarray(shape, np.dtype(dtype), buffer=shm.buf)
+    index = pd.DatetimeIndex(cols.pop('__date__').view('datetime64[ns]'), name=spec['index_name'])
+    stock = pd.Categorical.from_codes(cols.pop('__code__'), categories=spec['tickers'])
+    _WORKER['blocks'] = blocks
+    _WORKER['frame'] = pd.DataFrame({'stock': stock, **cols}, index=index, copy=False)
+
+def _run_task(func, bounds, kwargs):
+    a, b = bounds
+    return func(_WORKER['frame'].iloc[a:b], **kwargs)
+
+def run_sharded(func, panel, workers=None, **kwargs):
+    """
+    Apply func(frame_shard, **kwargs) to contiguous ticker shards of the panel and concat the
+    resulting tables. func must be a picklable module-level function whose output for a shard
+    only depends on that shard's tickers. workers<=1 (or no shared memory) runs sequentially.
+    """
+    workers = default_workers() if workers is None else workers
+    bounds = shard_bounds(panel, workers * 4)
+    if workers > 1 and len(bounds) > 1:
+        try:
+            with SharedPanel(panel) as shared, \
+                    ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(shared.spec,)) as pool:
+                parts = list(pool.map(_run_task, [func] * len(bounds), bounds, [kwargs] * len(bounds)))
+            return pd.concat(parts, ignore_index=True)
+        except (OSError, BrokenProcessPool):
+            pass  # no /dev/shm or process spawning, or a worker died: fall through to sequential
+    parts = [func(panel.frame.iloc[a:b], **kwargs) for a, b in bounds]
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+
+def _screen_shard(frame, start_md, end_md, price_col):
+    return _uncached(screen_universe)(frame, start_md, end_md, price_col)
+
+def _monthly_shard(frame, start_day, end_day):
+    return _uncached(compute_monthly_returns)(frame, start_day, end_day)
+
+def _seasonality_shard(frame):
+    out = []
+    for stock, df in frame.groupby('stock', observed=True, sort=True):
+        heat, _, _ = _uncached(compute_seasonality_heatmap)(df.drop(columns=['stock']))
+        long = heat.rename_axis(index='Year', columns='Month').stack().dropna().rename('Return (%)').reset_index()
+        out.append(long.assign(Stock=stock))
+    cols = ['Stock', 'Year', 'Month', 'Return (%)']
+    return pd.concat(out, ignore_index=True)[cols] if out else pd.DataFrame(columns=cols)
+
+def _weekday_shard(frame, start_period, end_period):
+    out = []
+    for stock, df in frame.groupby('stock', observed=True, sort=True):
+        wd = _uncached(compute_weekday_returns)(df.drop(columns=['stock']), start_period, end_period)
+        if wd is not None:
+            out.append(wd.assign(Stock=stock))
+    cols = ['Stock', 'Weekday', 'Avg Return (%)', 'Positive Ratio (%)', 'Negative Ratio (%)']
+    return pd.concat(out, ignore_index=True)[cols] if out else pd.DataFrame(columns=cols)
+
+def parallel_screen(panel, start_md, end_md, price_col='close', workers=None):
+    """screen_universe over the whole panel, sharded across processes."""
+    return run_sharded(_screen_shard, panel, workers, start_md=start_md, end_md=end_md, price_col=price_col)
+
+def parallel_monthly(panel, start_day, end_day, workers=None):
+    """Multi-ticker compute_monthly_returns over the whole panel, sharded across processes."""
+    return run_sharded(_monthly_shard, panel, workers, start_day=start_day, end_day=end_day)
+
+def parallel_weekday(panel, start_period, end_period, workers=None):
+    """Every ticker's compute_weekday_returns table, with a leading Stock column."""
+    return run_sharded(_weekday_shard, panel, workers, start_period=start_period, end_period=end_period)
+
+def parallel_seasonality(panel, workers=None):
+    """Every ticker's seasonality heatmap as a long (Stock, Year, Month, Return) table."""
+    out = run_sharded(_seasonality_shard, panel, workers)
+    order = {m: i for i, m in enumerate(calendar.month_abbr)}
+    return out.sort_values(['Stock', 'Year', 'Month'], key=lambda s: s.map(order) if s.name == 'Month' else s, ignore_index=True)
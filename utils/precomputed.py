@@ -0,0 +1,71 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+import calendar
+import json
+import os
+from utils.data_loader import DEFAULT_PATH, file_fingerprint, source_digest, source_fingerprint
+
+PRECOMPUTED_DIR = 'precomputed'
+MANIFEST = 'manifest.json'
+
+def report_key(kind, params):
+    """File stem for a report: kind plus its parameters, e.g. screener_0315-0610."""
+    if kind == 'screener':
+        (sm, sd), (em, ed) = params
+        return f"screener_{sm:02d}{sd:02d}-{em:02d}{ed:02d}"
+    if kind == 'monthly':
+        return f"monthly_{params[0]}-{params[1]}"
+    return kind
+
+def write_report(out_dir, kind, params, df, manifest):
+    key = report_key(kind, params)
+    df.to_parquet(os.path.join(out_dir, key + '.parquet'), index=False)
+    manifest['reports'][key] = {'kind': kind, 'params': params, 'rows': len(df)}
+
+class Reports:
+    """Precomputed batch results for the current dataset; get() returns None when absent or stale."""
+
+    def __init__(self, root, manifest):
+        self.root = root
+        self.manifest = manifest
+        self._frames = {}
+
+    def get(self, kind, params=None):
+        key = report_key(kind, params)
+        if key not in self.manifest.get('reports', {}):
+            return None
+        if key not in self._frames:
+            self._frames[key] = pd.read_parquet(os.path.join(self.root, key + '.parquet'))
+        return self._frames[key]
+
+    def for_stock(self, kind, stock, params=None):
+        df = self.get(kind, params)
+        if df is None:
+            return None
+        return df[df['Stock'] == stock].drop(columns=['Stock']).reset_index(drop=True)
+
+def heatmap_from_long(long):
+    """Rebuild compute_seasonality_heatmap's (pivot, pos, neg) from a (Year, Month, Return) table."""
+    pivot = long.pivot(index='Year', columns='Month', values='Return (%)').rename_axis(index='year', columns=None)
+    pivot = pivot.reindex(columns=calendar.month_abbr[1:], fill_value=np.nan).round(2)
+    pos = (pivot > 0).sum() / pivot.notna().sum() * 100
+    neg = (pivot < 0).sum() / pivot.notna().sum() * 100
+    return pivot, pos.round(2), neg.round(2)
+
+@st.cache_resource(max_entries=1)
+def _load_reports(root, data_path, fingerprint):
+    path = os.path.join(root, MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        manifest = json.load(f)
+    if manifest.get('digest') != source_digest(data_path):
+        return None
+    return Reports(root, manifest)
+
+def load_reports(root=PRECOMPUTED_DIR, data_path=DEFAULT_PATH):
+    """Reports written by batch.py for the current data file, or None."""
+    manifest = os.path.join(root, MANIFEST)
+    stamp = file_fingerprint(manifest) if os.path.exists(manifest) else None
+    return _load_reports(root, data_path, (source_fingerprint(data_path), stamp))
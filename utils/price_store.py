@@ -0,0 +1,274 @@
+"""
+Append-only SQLite store of daily bars, versioned per append, so a nightly refresh adds the new
+day instead of rewriting and re-parsing all_stocks.csv. The app's loader reads from it when it
+exists next to the CSV, and folds later appends into the panel and its derived state in place.
+
+    python -m utils.price_store append uploaded_files/all_stocks.csv   # initial import
+    python -m utils.price_store append new_day.csv                     # nightly refresh
+    python -m utils.price_store info
+"""
+import argparse
+import contextlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+import pandas as pd
+from utils.panel import PricePanel
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS versions (
+    version INTEGER PRIMARY KEY, created TEXT, source TEXT, rows INTEGER, skipped INTEGER,
+    backfill INTEGER, first_date INTEGER, last_date INTEGER
+);
+CREATE TABLE IF NOT EXISTS watermarks (
+    stock TEXT PRIMARY KEY, first_date INTEGER, last_date INTEGER, rows INTEGER, version INTEGER
+);
+"""
+
+def _sql_type(dtype):
+    return 'INTEGER' if dtype.kind in 'iub' else 'REAL' if dtype.kind == 'f' else 'TEXT'
+
+def normalize_bars(df):
+    """A load_default-style frame (DatetimeIndex 'date', stock column) from a raw or loaded one."""
+    df = df.reset_index() if df.index.name == 'date' else df.copy()
+    df.columns = df.columns.str.lower()
+    df = df.dropna(subset=['stock'])
+    df['stock'] = df['stock'].astype(str)
+    df['date'] = pd.to_datetime(df['date'])
+    df = df.drop_duplicates(['stock', 'date'], keep='last')
+    return df.sort_values(['stock', 'date']).set_index('date')
+
+class PriceStore:
+    """
+    bars(stock, date) holds every bar with the version that added it; versions is the change log and
+    watermarks each ticker's date range and latest version. Bars already present are skipped, so a
+    bar is never rewritten. An append with bars dated before a ticker's watermark is a backfill.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with self._connect() as con:
+            con.execute('PRAGMA journal_mode=WAL')  # the app keeps reading while a refresh writes
+            con.executescript(SCHEMA)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        con = sqlite3.connect(self.path, timeout=60)
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    @property
+    def columns(self):
+        """Stored bar columns as [(name, sql type)], fixed by the first append; [] for an empty store."""
+        with self._connect() as con:
+            row = con.execute("SELECT value FROM meta WHERE key = 'columns'").fetchone()
+        return [tuple(c) for c in json.loads(row[0])] if row else []
+
+    @property
+    def version(self):
+        with self._connect() as con:
+            return con.execute('SELECT coalesce(max(version), 0) FROM versions').fetchone()[0]
+
+    def changes(self, since=0, until=None):
+        """Change log entries after version since (up to until)."""
+        with self._connect() as con:
+            return pd.read_sql_query('SELECT * FROM versions WHERE version > ? AND version <= ? ORDER BY version', con,
+                                     params=(since, until if until is not None else 2**62))
+
+    def watermarks(self):
+        """Per ticker: first/last bar date, row count and the last version that added bars to it."""
+        with self._connect() as con:
+            df = pd.read_sql_query('SELECT * FROM watermarks ORDER BY stock', con, index_col='stock')
+        for c in ('first_date', 'last_date'):
+            df[c] = pd.to_datetime(df[c], unit='ns')
+        return df
+
+    def stamps(self):
+        """ticker -> last version that added bars to it."""
+        with self._connect() as con:
+            return dict(con.execute('SELECT stock, version FROM watermarks'))
+
+    def _create(self, con, df):
+        cols = [(c, _sql_type(df[c].dtype)) for c in df.columns if c != 'stock']
+        defs = ''.join(f', "{c}" {t}' for c, t in cols)
+        con.execute(f'CREATE TABLE bars (stock TEXT NOT NULL, date INTEGER NOT NULL{defs}, version INTEGER NOT NULL, '
+                    'PRIMARY KEY (stock, date)) WITHOUT ROWID')
+        con.execute('CREATE INDEX bars_version ON bars (version)')
+        con.execute("INSERT INTO meta VALUES ('columns', ?)", (json.dumps(cols),))
+        return cols
+
+    def append(self, df, source=None):
+        """
+        Add bars (raw or load_default-style frame) as a new version; returns it, or the current
+        version when every bar was already stored. Columns the store doesn't have are an error.
+        """
+        df = normalize_bars(df)
+        with self._connect() as con:
+            con.execute('BEGIN IMMEDIATE')  # one writer at a time; the version number is taken under this lock
+            row = con.execute("SELECT value FROM meta WHERE key = 'columns'").fetchone()
+            cols = [tuple(c) for c in json.loads(row[0])] if row else self._create(con, df)
+            names = [c for c, _ in cols]
+            extra = set(df.columns) - set(names) - {'stock'}
+            if extra:
+                raise ValueError(f"Columns not in the price store: {', '.join(sorted(extra))}")
+            version = con.execute('SELECT coalesce(max(version), 0) FROM versions').fetchone()[0] + 1
+
+            quoted = ''.join(f', "{c}"' for c in names)
+            con.execute(f'CREATE TEMP TABLE staging AS SELECT stock, date{quoted} FROM bars WHERE 0')
+            data = df.reindex(columns=names)  # missing columns and NaN bind as NULL
+            con.executemany(f'INSERT INTO staging VALUES (?, ?{", ?" * len(names)})', zip(
+                df['stock'], df.index.as_unit('ns').asi8.tolist(), *(data[c].tolist() for c in names)))
+            # Bars not stored yet, and how many of those land at or before their ticker's watermark
+            con.execute('DELETE FROM staging WHERE EXISTS (SELECT 1 FROM bars b WHERE b.stock = staging.stock AND b.date = staging.date)')
+            rows = con.execute('SELECT count(*) FROM staging').fetchone()[0]
+            if not rows:
+                con.execute('DROP TABLE staging')
+                return version - 1
+            late = con.execute('SELECT count(*) FROM staging s JOIN watermarks w USING (stock) WHERE s.date <= w.last_date').fetchone()[0]
+            con.execute(f'INSERT INTO bars SELECT stock, date{quoted}, ? FROM staging', (version,))
+            con.execute("""
+                INSERT INTO watermarks SELECT stock, min(date), max(date), count(*), ? FROM staging WHERE true GROUP BY stock
+                ON CONFLICT (stock) DO UPDATE SET first_date = min(first_date, excluded.first_date),
+                    last_date = max(last_date, excluded.last_date), rows = rows + excluded.rows, version = excluded.version
+            """, (version,))
+            con.execute('INSERT INTO versions SELECT ?, ?, ?, count(*), ?, ?, min(date), max(date) FROM staging',
+                        (version, pd.Timestamp.now().isoformat(), source, len(df) - rows, int(late > 0)))
+            con.execute('DROP TABLE staging')
+        return version
+
+    def read(self, since=0, until=None):
+        """Bars added after version since (up to until) as a load_default-style frame, sorted by (stock, date)."""
+        names = [c for c, _ in self.columns]
+        if not names:
+            return pd.DataFrame(columns=['stock'], index=pd.DatetimeIndex([], name='date'))
+        quoted = ''.join(f', "{c}"' for c in names)
+        where = '' if not since and until is None else ' WHERE version > ? AND version <= ?'
+        params = () if not where else (since, until if until is not None else 2**62)
+        with self._connect() as con:
+            df = pd.read_sql_query(f'SELECT stock, date{quoted} FROM bars{where} ORDER BY stock, date', con, params=params)
+        df['date'] = pd.to_datetime(df['date'], unit='ns')
+        return df.set_index('date')
+
+def splice(panel, bars):
+    """
+    panel.frame with bars inserted after each ticker's rows (new tickers at their sorted position),
+    as one take over row positions rather than a sort. Bars must be sorted and later than their
+    ticker's existing rows.
+    """
+    old = np.array(panel.tickers, dtype=object)
+    codes, tickers = pd.factorize(bars['stock'], sort=True)
+    tickers = np.asarray(tickers, dtype=object)
+    pos = np.searchsorted(old, tickers)
+    at = np.where(np.isin(tickers, old), np.append(panel.stops, len(panel))[pos], np.append(panel.starts, len(panel))[pos])
+    take = np.insert(np.arange(len(panel)), at[codes], np.arange(len(panel), len(panel) + len(bars)))
+    return pd.concat([panel.frame, bars[panel.frame.columns]]).iloc[take]
+
+class LiveStore:
+    """
+    PricePanel over a PriceStore, kept at the store's latest version: refresh() splices in only the
+    bars added since the version it holds. State derived from the panel is advanced the same way by
+    derived(), so an append touches only the (ticker, year, month) cells its bars fall in.
+    """
+
+    def __init__(self, path, compact=False):
+        self.store = PriceStore(path)
+        self.compact = compact
+        self.version = None
+        self.panel = None
+        self._derived = {}   # name -> (version, state)
+        self._lock = threading.RLock()
+
+    def _backfilled(self, since, until):
+        return bool(self.store.changes(since, until)['backfill'].any())
+
+    def refresh(self):
+        """The panel at the store's latest version."""
+        with self._lock:
+            version = self.store.version
+            if version == self.version:
+                return self.panel
+            if self.panel is None or self._backfilled(self.version, version):
+                frame = self.store.read(until=version)
+            else:
+                frame = splice(self.panel, self.store.read(self.version, version))
+            fingerprint = ('store', self.store.path, self.compact, version)
+            self.panel = PricePanel.from_frame(frame, compact=self.compact, fingerprint=fingerprint, stamps=self.store.stamps())
+            self.version = version
+            return self.panel
+
+    def derived(self, name, build, append):
+        """
+        State derived from the panel, at the latest version: build(panel) the first time (or after a
+        backfill), afterwards append(state, bars, panel) with just the bars added since. append may
+        raise ValueError to ask for a rebuild.
+        """
+        with self._lock:
+            panel = self.refresh()
+            version, state = self._derived.get(name, (None, None))
+            if version == self.version:
+                return state
+            try:
+                if version is None or self._backfilled(version, self.version):
+                    raise ValueError("rebuild")
+                state = append(state, self.store.read(version, self.version), panel)
+            except ValueError:
+                state = build(panel)
+            self._derived[name] = (self.version, state)
+            return state
+
+_LIVE = {}
+_LIVE_LOCK = threading.Lock()
+
+def live_store(path, compact=False):
+    """Process-wide LiveStore per (store file, compact)."""
+    with _LIVE_LOCK:
+        key = (os.path.abspath(path), compact)
+        if key not in _LIVE:
+            _LIVE[key] = LiveStore(path, compact)
+        return _LIVE[key]
+
+def live_source(panel):
+    """The LiveStore a panel came from, or None for file-backed panels."""
+    fp = getattr(panel, 'fingerprint', None)
+    if isinstance(fp, tuple) and fp and fp[0] == 'store':
+        return live_store(fp[1], fp[2])
+    return None
+
+def read_bars(path):
+    """Bars from a CSV or Excel file, normalized for append."""
+    raw = pd.read_excel(path) if path.lower().endswith('.xlsx') else pd.read_csv(path)
+    return normalize_bars(raw)
+
+def main():
+    from utils.data_loader import DEFAULT_PATH, store_path
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('command', choices=['append', 'info'])
+    ap.add_argument('files', nargs='*', help="CSV/Excel files of bars to append")
+    ap.add_argument('--store', default=store_path(DEFAULT_PATH))
+    args = ap.parse_args()
+
+    store = PriceStore(args.store)
+    for path in args.files if args.command == 'append' else []:
+        t0 = time.perf_counter()
+        before = store.version
+        version = store.append(read_bars(path), source=os.path.basename(path))
+        if version == before:
+            print(f"{path}: nothing new (version {version})")
+        else:
+            log = store.changes(before).iloc[-1]
+            kind = ' (backfill)' if log['backfill'] else ''
+            print(f"{path}: version {version}, {log['rows']} bars added, {log['skipped']} already stored{kind}, "
+                  f"{time.perf_counter() - t0:.2f}s")
+    marks = store.watermarks()
+    print(f"{args.store}: version {store.version}, {len(marks)} tickers, {marks['rows'].sum() if len(marks) else 0} bars, "
+          f"through {marks['last_date'].max() if len(marks) else '-'}")
+
+if __name__ == '__main__':
+    main()
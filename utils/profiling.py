@@ -0,0 +1,172 @@
+import contextlib
+import cProfile
+import functools
+import json
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+import pandas as pd
+
+# RA_PROFILE_LOG=path appends one JSON line per rerun (spans and totals) to that file
+LOG_PATH = os.environ.get('RA_PROFILE_LOG') or None
+SPAN_COLUMNS = ['Span', 'Depth', 'Start (ms)', 'Time (ms)', 'Self (ms)', 'Hits', 'Misses', 'Alloc (MB)', 'Peak (MB)']
+
+_local = threading.local()  # Streamlit runs each session's rerun on its own thread
+
+class Span:
+    """One timed region of a rerun; cache hits/misses noted inside it count towards its parents too."""
+
+    def __init__(self, name, depth, start):
+        self.name = name
+        self.depth = depth
+        self.start = start
+        self.seconds = 0.0
+        self.child_seconds = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.alloc = 0
+        self.peak = 0
+
+    def cache(self, hit):
+        for span in _current().stack:
+            if hit:
+                span.hits += 1
+            else:
+                span.misses += 1
+
+class _NullSpan:
+    def cache(self, hit):
+        pass
+
+_NULL = _NullSpan()
+
+class Recorder:
+    """
+    Spans of one rerun, in start order. trace_memory adds tracemalloc allocation/peak per span
+    (slows the rerun noticeably); profile runs cProfile over the whole rerun for export.
+    """
+
+    def __init__(self, label=None, trace_memory=False, profile=False):
+        self.label = label or time.strftime('%H:%M:%S')
+        self.trace_memory = trace_memory
+        self.spans = []
+        self.stack = []
+        self._mem = []  # per open span: [current at start, highest peak seen]
+        self.t0 = time.perf_counter()
+        self.seconds = None
+        self.profile = cProfile.Profile() if profile else None
+        self.prof_bytes = None
+        self._started_tracing = False
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        if self.profile is not None:
+            try:
+                self.profile.enable()
+            except ValueError:  # another session is already profiling (one profiler per process)
+                self.profile = None
+
+    def _enter(self, name):
+        span = Span(name, len(self.stack), time.perf_counter() - self.t0)
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._mem:
+                self._mem[-1][1] = max(self._mem[-1][1], peak)
+            tracemalloc.reset_peak()
+            self._mem.append([current, current])
+        self.spans.append(span)
+        self.stack.append(span)
+        return span
+
+    def _exit(self, span, t_start):
+        span.seconds = time.perf_counter() - t_start
+        self.stack.pop()
+        if self.stack:
+            self.stack[-1].child_seconds += span.seconds
+        if self.trace_memory:
+            start, seen = self._mem.pop()
+            current, peak = tracemalloc.get_traced_memory()
+            peak = max(seen, peak)
+            span.alloc, span.peak = current - start, peak - start
+            if self._mem:
+                self._mem[-1][1] = max(self._mem[-1][1], peak)
+            tracemalloc.reset_peak()
+
+    def finish(self):
+        self.seconds = time.perf_counter() - self.t0
+        if self.profile is not None:
+            self.profile.disable()
+            with tempfile.NamedTemporaryFile(suffix='.prof', delete=False) as f:
+                path = f.name
+            try:
+                self.profile.dump_stats(path)
+                with open(path, 'rb') as f:
+                    self.prof_bytes = f.read()
+            finally:
+                os.remove(path)
+            self.profile = None
+        if self._started_tracing:
+            tracemalloc.stop()
+        return self
+
+    def table(self):
+        """Spans as a frame, indented by nesting; Self is time not spent in child spans."""
+        return pd.DataFrame([(
+            '  ' * s.depth + s.name, s.depth, s.start * 1e3, s.seconds * 1e3, (s.seconds - s.child_seconds) * 1e3,
+            s.hits, s.misses, s.alloc / 2**20, s.peak / 2**20,
+        ) for s in self.spans], columns=SPAN_COLUMNS).round(2)
+
+    def to_json(self):
+        return json.dumps({'label': self.label, 'seconds': self.seconds, 'spans': [{
+            'name': s.name, 'depth': s.depth, 'start': s.start, 'seconds': s.seconds,
+            'hits': s.hits, 'misses': s.misses, 'alloc': s.alloc, 'peak': s.peak,
+        } for s in self.spans]})
+
+def _current():
+    return getattr(_local, 'recorder', None)
+
+def start_rerun(label=None, trace_memory=False, profile=False):
+    """Begin recording spans on this thread; returns the Recorder."""
+    _local.recorder = Recorder(label, trace_memory, profile)
+    return _local.recorder
+
+def finish_rerun():
+    """Stop recording on this thread, append to RA_PROFILE_LOG if set, and return the Recorder."""
+    rec = _current()
+    _local.recorder = None
+    if rec is None:
+        return None
+    rec.finish()
+    if LOG_PATH:
+        try:
+            with open(LOG_PATH, 'a') as f:
+                f.write(rec.to_json() + '\n')
+        except OSError:
+            pass
+    return rec
+
+@contextlib.contextmanager
+def span(name):
+    """Time the block as a span of the current rerun; a no-op when nothing is recording."""
+    rec = _current()
+    if rec is None:
+        yield _NULL
+        return
+    s = rec._enter(name)
+    t0 = time.perf_counter()
+    try:
+        yield s
+    finally:
+        rec._exit(s, t0)
+
+def traced(name):
+    """Decorator form of span."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
@@ -0,0 +1,116 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+from utils.profiling import span
+from utils.result_cache import ResultCache, cached
+
+MAX_POINTS = 2000   # per time-series trace sent to the browser
+DETAIL_MAX = 60     # correlation matrices up to this size are drawn cell by cell
+BLOCK = 40          # tickers per block in the overview / drill-down
+
+# Built figures per parameter set; small and memory-only, separate from the results cache
+FIGURES = ResultCache(max_bytes=64 * 2**20)
+PAYLOADS = {}  # chart name -> (serialized bytes, points) of the last figure built for it
+
+def lttb(x, y, n_out=MAX_POINTS):
+    """
+    Largest-triangle-three-buckets: indices of n_out points of (x, y) that keep the line's shape.
+    x must be increasing and numeric; returns all indices when the series is already short.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x, y = np.asarray(x, dtype='float64'), np.asarray(y, dtype='float64')
+    edges = np.linspace(1, n - 1, n_out - 1).astype('int64')
+    idx = np.empty(n_out, dtype='int64')
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nhi = edges[i + 2] if i + 2 < len(edges) else n
+        cx, cy = x[hi:nhi].mean(), y[hi:nhi].mean()
+        # Twice the triangle area between the last pick, each candidate and the next bucket's centroid
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area)) if hi > lo else a
+        idx[i + 1] = a
+    return np.unique(idx)
+
+def downsample(series, n_out=MAX_POINTS):
+    """A date-indexed series reduced to at most n_out points with LTTB (NaNs dropped first)."""
+    s = series.dropna()
+    if len(s) <= n_out:
+        return s
+    return s.iloc[lttb(s.index.asi8, s.to_numpy(), n_out)]
+
+def spectral_order(corr):
+    """
+    Seriation of a correlation matrix by its Fiedler vector, so correlated tickers sit together
+    and blocks along the diagonal are meaningful. corr may be in percent; NaN counts as unrelated.
+    """
+    a = np.nan_to_num((np.asarray(corr, dtype='float64') / 100 + 1) / 2, nan=0.0)
+    np.fill_diagonal(a, 0.0)
+    if len(a) < 3:
+        return np.arange(len(a))
+    lap = np.diag(a.sum(axis=1)) - a
+    _, vecs = np.linalg.eigh(lap)
+    return np.argsort(vecs[:, 1], kind='stable')
+
+@cached('corr_blocks')
+def corr_blocks(corr, block=BLOCK):
+    """
+    Reorder corr (a labelled frame) and cut it into contiguous blocks of at most `block` tickers.
+    Returns (ordered corr, block labels, block bounds, block x block mean correlation).
+    """
+    order = spectral_order(corr.values)
+    ordered = corr.iloc[order, order]
+    bounds = [(lo, min(lo + block, len(order))) for lo in range(0, len(order), block)]
+    labels = [f"{ordered.index[lo]} – {ordered.index[hi - 1]}" for lo, hi in bounds]
+    vals = ordered.values
+    with np.errstate(invalid='ignore'):
+        means = np.array([[np.nanmean(vals[r0:r1, c0:c1]) if np.isfinite(vals[r0:r1, c0:c1]).any() else np.nan
+                           for c0, c1 in bounds] for r0, r1 in bounds])
+    return ordered, labels, bounds, pd.DataFrame(means, index=labels, columns=labels)
+
+def _points(fig):
+    """Cells of heatmaps plus points of x/y traces."""
+    total = 0
+    for t in fig.data:
+        z = getattr(t, 'z', None)
+        total += int(np.size(z)) if z is not None else int(np.size(t.x)) if t.x is not None else 0
+    return total
+
+class _Built:
+    """A built figure with its serialized size, which FIGURES takes as its nbytes instead of pickling it."""
+    __slots__ = ('fig', 'nbytes')
+
+    def __init__(self, fig, nbytes):
+        self.fig = fig
+        self.nbytes = nbytes
+
+def cached_figure(name, key, build):
+    """
+    The figure build() returns, memoized per (name, key) so reruns skip building it; plot() still
+    serializes it on every run. Its JSON size, measured once, sizes the cache entry and is recorded
+    in PAYLOADS for the debug panel.
+    """
+    with span(f'figure:{name}') as sp:
+        missed = []
+        def make():
+            missed.append(1)
+            fig = build()
+            size = len(fig.to_json())
+            PAYLOADS[name] = (size, _points(fig))
+            return _Built(fig, size)
+        built = FIGURES.get_or_compute((name, key), make)
+        sp.cache(hit=not missed)
+        return built.fig
+
+def plot(fig, name, **kwargs):
+    """st.plotly_chart in a 'chart:<name>' span; Streamlit validates and serializes the figure here."""
+    with span(f'chart:{name}'):
+        return st.plotly_chart(fig, **kwargs)
+
+def payload_stats():
+    """Last-built chart payloads as a table, largest first."""
+    rows = [(n, b / 1024, p) for n, (b, p) in PAYLOADS.items()]
+    return pd.DataFrame(rows, columns=['Chart', 'Payload (KB)', 'Points']).sort_values('Payload (KB)', ascending=False).round(1)
@@ -0,0 +1,199 @@
+import functools
+import hashlib
+import os
+import pickle
+import threading
+import weakref
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from utils.profiling import span
+
+def nbytes(value):
+    """Approximate resident size of a cached result."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(getattr(value, 'nbytes', None), int):  # objects that size themselves (panels, engines)
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sum(nbytes(v) for v in value) + 64
+    if value is None:
+        return 16
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return 1024
+
+class ResultCache:
+    """
+    Two-tier result cache: an in-process LRU bounded by bytes, backed by an optional directory of
+    pickles shared by every worker process on the host (also byte-bounded, oldest-access first).
+    """
+
+    def __init__(self, max_bytes=512 * 2**20, disk_dir=None, disk_max_bytes=4 * 2**30):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._items = OrderedDict()   # digest -> (value, size)
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0, 'disk_evictions': 0}
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    @staticmethod
+    def digest(key):
+        return hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+
+    def __len__(self):
+        return len(self._items)
+
+    @property
+    def bytes(self):
+        return self._bytes
+
+    def get(self, key, default=None):
+        d = self.digest(key)
+        with self._lock:
+            if d in self._items:
+                self._items.move_to_end(d)
+                self.stats['hits'] += 1
+                return self._items[d][0]
+        value = self._disk_get(d)
+        if value is not None:
+            with self._lock:
+                self.stats['disk_hits'] += 1
+            self._put_memory(d, value)
+            return value
+        with self._lock:
+            self.stats['misses'] += 1
+        return default
+
+    def put(self, key, value):
+        d = self.digest(key)
+        self._put_memory(d, value)
+        self._disk_put(d, value)
+
+    def get_or_compute(self, key, compute):
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    def _put_memory(self, d, value):
+        size = nbytes(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if d in self._items:
+                self._bytes -= self._items.pop(d)[1]
+            self._items[d] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, old) = self._items.popitem(last=False)
+                self._bytes -= old
+                self.stats['evictions'] += 1
+
+    def _disk_path(self, d):
+        return os.path.join(self.disk_dir, d + '.pkl')
+
+    def _disk_get(self, d):
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._disk_path(d), 'rb') as f:
+                value = pickle.load(f)
+            os.utime(self._disk_path(d))
+            return value
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def _disk_put(self, d, value):
+        if not self.disk_dir:
+            return
+        tmp = f"{self._disk_path(d)}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self._disk_path(d))
+            self._disk_trim()
+        except (OSError, pickle.PicklingError, TypeError, AttributeError):
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+    def _disk_trim(self):
+        entries = []
+        for name in os.listdir(self.disk_dir):
+            if name.endswith('.pkl'):
+                try:
+                    st = os.stat(os.path.join(self.disk_dir, name))
+                    entries.append((st.st_atime if st.st_atime > st.st_mtime else st.st_mtime, st.st_size, name))
+                except OSError:
+                    continue
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.disk_dir, name))
+                total -= size
+                with self._lock:
+                    self.stats['disk_evictions'] += 1
+            except OSError:
+                pass
+
+# Cheap dataset keys: frames handed out by the loader are registered with (fingerprint, ticker)
+# so cached functions never hash their contents. Unregistered frames fall back to a content hash.
+_DATASET_KEYS = {}
+
+def register_dataset(df, key):
+    ident = id(df)
+    _DATASET_KEYS[ident] = (weakref.ref(df, lambda _: _DATASET_KEYS.pop(ident, None)), key)
+    return df
+
+def dataset_key(df):
+    entry = _DATASET_KEYS.get(id(df))
+    if entry is not None and entry[0]() is df:
+        return entry[1]
+    if getattr(df, 'fingerprint', None) is not None:
+        return (type(df).__name__, df.fingerprint)
+    if isinstance(df, (pd.DataFrame, pd.Series)):
+        cols = tuple(map(str, df.columns)) if isinstance(df, pd.DataFrame) else (str(df.name),)
+        rows = hashlib.blake2b(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes(), digest_size=16).hexdigest()
+        return ('content', cols, rows)
+    return ('value', repr(df))
+
+RESULTS = ResultCache(
+    max_bytes=int(float(os.environ.get('RA_CACHE_MB', 512)) * 2**20),
+    disk_dir=os.environ.get('RA_CACHE_DIR') or None,
+)
+
+def cached(name, cache=None):
+    """
+    Cache fn(df, *params) in the shared ResultCache under (name, dataset_key(df), params).
+    Results are shared between callers, so treat them as read-only.
+    """
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(df, *args, **kwargs):
+            with span(f'compute:{name}') as sp:
+                key = (name, dataset_key(df), args, tuple(sorted(kwargs.items())))
+                missed = []
+                value = (RESULTS if cache is None else cache).get_or_compute(key, lambda: missed.append(1) or fn(df, *args, **kwargs))
+                sp.cache(hit=not missed)
+                return value
+        return wrapper
+    return deco
@@ -0,0 +1,54 @@
+import pandas as pd
+import numpy as np
+from utils.result_cache import cached
+
+SCREENER_COLUMNS = ['Ticker', 'Avg Return (%)', 'Positive Ratio (%)', 'Negative Ratio (%)']
+
+def window_returns(df, start_md, end_md, price_col='close', stock_col='stock'):
+    """
+    Per (stock, year) returns from first trading >= start_md to last trading <= end_md,
+    for every stock in one pass. Same semantics as screener_tab.compute_period_returns.
+    """
+    if isinstance(df.index, pd.DatetimeIndex):
+        dates = df.index
+    else:
+        dates = pd.DatetimeIndex(pd.to_datetime(df['date'], errors='coerce'))
+    prices = pd.to_numeric(df[price_col], errors='coerce').to_numpy(dtype='float64')
+    stocks = df[stock_col].to_numpy() if stock_col in df.columns else np.zeros(len(df), dtype=int)
+    valid = ~np.isnan(prices) & ~np.isnat(dates.to_numpy())
+    dates, prices, stocks = dates[valid], prices[valid], stocks[valid]
+    codes, tickers = pd.factorize(stocks, sort=True)
+
+    # Sort by (stock, date) and encode each row as stock/year/MMDD so windows become searchsorted lookups
+    codes = codes.astype('int64')
+    years = dates.year.to_numpy().astype('int64')
+    md = (dates.month * 100 + dates.day).to_numpy().astype('int64')
+    order = np.lexsort((dates.asi8, codes))
+    group = (codes * 10000 + years)[order]
+    keys = group * 10000 + md[order]
+    prices = prices[order]
+
+    gvals, gstart = np.unique(group, return_index=True)
+    gstop = np.append(gstart[1:], len(group))
+    first = np.searchsorted(keys, gvals * 10000 + start_md[0] * 100 + start_md[1], side='left')
+    last = np.searchsorted(keys, gvals * 10000 + end_md[0] * 100 + end_md[1], side='right') - 1
+    ok = (first < gstop) & (last >= gstart)
+
+    p0, p1 = prices[first[ok]], prices[last[ok]]
+    return pd.DataFrame({
+        'stock': np.asarray(tickers)[gvals[ok] // 10000],
+        'year': (gvals[ok] % 10000).astype(int),
+        'return': (p1 / p0 - 1) * 100,
+    })
+
+@cached('screener')
+def screen_universe(df, start_md, end_md, price_col='close'):
+    """Avg/Positive/Negative window stats for every stock in df, no per-ticker loop."""
+    pr = window_returns(df, start_md, end_md, price_col)
+    grp = pr.groupby('stock', sort=True)['return']
+    out = pd.DataFrame({
+        'Avg Return (%)': grp.mean(),
+        'Positive Ratio (%)': pr['return'].gt(0).groupby(pr['stock']).mean() * 100,
+        'Negative Ratio (%)': pr['return'].lt(0).groupby(pr['stock']).mean() * 100,
+    })
+    return out.rename_axis('Ticker').reset_index()[SCREENER_COLUMNS]
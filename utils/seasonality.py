@@ -0,0 +1,131 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+import calendar
+import warnings
+from utils.panel import PricePanel
+from utils.price_store import live_source
+
+MONTHS = list(calendar.month_abbr)[1:]
+
+class SeasonalityCube:
+    """
+    Dense (stock x year x month) first/last closes over a price panel, filled in one pass over
+    the (stock, date)-sorted rows. Per-ticker heatmaps and cross-sectional aggregates are views of it.
+    """
+
+    def __init__(self, tickers, years, first, last, fingerprint=None):
+        self.tickers = tickers
+        self.years = years
+        self.first = first
+        self.last = last
+        self.fingerprint = fingerprint
+        self._codes = {t: i for i, t in enumerate(tickers)}
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.returns = (last - first) / first * 100
+
+    @classmethod
+    def build(cls, df, price_col='close', stock_col='stock', fingerprint=None):
+        close = pd.to_numeric(df[price_col], errors='coerce').to_numpy(dtype='float64')
+        dates = df.index
+        valid = ~np.isnan(close)
+        dates, close, stocks = dates[valid], close[valid], df[stock_col].to_numpy()[valid]
+        codes, tickers = pd.factorize(stocks, sort=True)
+        order = np.lexsort((dates.asi8, codes))
+        dates, close, codes = dates[order], close[order], codes[order].astype('int64')
+
+        years = np.arange(dates.year.min(), dates.year.max() + 1) if len(dates) else np.array([], dtype=int)
+        n_stocks, n_years = len(tickers), len(years)
+        flat = (codes * n_years + (dates.year.to_numpy() - (years[0] if n_years else 0))) * 12 + dates.month.to_numpy() - 1
+
+        # flat is non-decreasing, so each (stock, year, month) is one run: its first and last rows
+        first = np.full(n_stocks * n_years * 12, np.nan)
+        last = np.full(n_stocks * n_years * 12, np.nan)
+        starts = np.insert(flat[1:] != flat[:-1], 0, True)
+        ends = np.append(flat[1:] != flat[:-1], True)
+        first[flat[starts]] = close[starts]
+        last[flat[ends]] = close[ends]
+        shape = (n_stocks, n_years, 12)
+        return cls(list(tickers), years, first.reshape(shape), last.reshape(shape), fingerprint)
+
+    @classmethod
+    def for_series(cls, df, name='series', price_col='close'):
+        """Single-ticker cube over an uploaded frame (no stock column)."""
+        return cls.build(df.assign(stock=name), price_col)
+
+    def append(self, bars, price_col='close', stock_col='stock', fingerprint=None):
+        """
+        Cube with bars added; they must come after each ticker's existing rows, so only the
+        (stock, year, month) cells they fall in change: first closes fill gaps, last closes move on.
+        """
+        new = SeasonalityCube.build(bars, price_col, stock_col)
+        if not len(new.tickers):
+            return self
+        if not len(self.tickers):
+            return SeasonalityCube.build(bars, price_col, stock_col, fingerprint)
+        tickers = sorted(set(self.tickers) | set(new.tickers))
+        years = np.arange(min(self.years[0], new.years[0]), max(self.years[-1], new.years[-1]) + 1)
+        first = np.full((len(tickers), len(years), 12), np.nan)
+        last = np.full((len(tickers), len(years), 12), np.nan)
+        s, y0 = np.searchsorted(tickers, self.tickers), self.years[0] - years[0]
+        first[s, y0:y0 + len(self.years)] = self.first
+        last[s, y0:y0 + len(self.years)] = self.last
+        s, y0 = np.searchsorted(tickers, new.tickers), new.years[0] - years[0]
+        ys = slice(y0, y0 + len(new.years))
+        first[s, ys] = np.where(np.isnan(first[s, ys]), new.first, first[s, ys])
+        last[s, ys] = np.where(np.isnan(new.last), last[s, ys], new.last)
+        return SeasonalityCube(tickers, years, first, last, fingerprint)
+
+    def __contains__(self, stock):
+        return stock in self._codes
+
+    def _pivot(self, values):
+        """(year x month) frame with empty years dropped, shaped like compute_seasonality_heatmap's."""
+        keep = ~np.isnan(values).all(axis=1)
+        return pd.DataFrame(values[keep], index=pd.Index(self.years[keep], name='year'), columns=MONTHS).round(2)
+
+    def heatmap(self, stock):
+        """(pivot, positive ratio, negative ratio) for one ticker, as compute_seasonality_heatmap returns."""
+        pivot = self._pivot(self.returns[self._codes[stock]])
+        n = pivot.notna().sum()
+        return pivot, ((pivot > 0).sum() / n * 100).round(2), ((pivot < 0).sum() / n * 100).round(2)
+
+    def market(self, stat='median'):
+        """(year x month) cross-sectional median or mean return over all tickers with data."""
+        agg = np.nanmedian if stat == 'median' else np.nanmean
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)  # all-NaN cells: no ticker traded that month
+            return self._pivot(agg(self.returns, axis=0))
+
+    def breadth(self):
+        """(year x month) share (%) of tickers with a positive return."""
+        n = (~np.isnan(self.returns)).sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self._pivot(np.where(n > 0, (self.returns > 0).sum(axis=0) / n * 100, np.nan))
+
+    def ranks(self, stock):
+        """(year x month) percentile rank (%) of stock's return among the tickers with data; 100 = best."""
+        ret = self.returns
+        mine = ret[self._codes[stock]]
+        valid = ~np.isnan(ret)
+        below = ((ret < mine) & valid).sum(axis=0)
+        ties = ((ret == mine) & valid).sum(axis=0)
+        n = valid.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            pct = np.where(~np.isnan(mine) & (n > 1), (below + (ties - 1) / 2) / (n - 1) * 100, np.nan)
+        return self._pivot(pct)
+
+def panel_seasonality(panel, price_col='close'):
+    """Shared SeasonalityCube per (panel, price column); heatmaps and market views reuse it."""
+    live = live_source(panel)
+    if live is not None:  # store-backed: extended with each new version's bars
+        return live.derived(
+            ('seasonality', price_col),
+            lambda p: SeasonalityCube.build(p.frame, price_col, fingerprint=p.fingerprint),
+            lambda cube, bars, p: cube.append(bars, price_col, fingerprint=p.fingerprint),
+        )
+    return _panel_seasonality(panel, price_col)
+
+@st.cache_resource(max_entries=2, hash_funcs={PricePanel: lambda p: p.fingerprint or id(p)}, show_spinner="Building seasonality...")
+def _panel_seasonality(panel, price_col):
+    return SeasonalityCube.build(panel.frame, price_col, fingerprint=panel.fingerprint)
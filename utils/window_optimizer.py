@@ -0,0 +1,66 @@
+import pandas as pd
+import numpy as np
+import calendar
+from utils.day_index import MONTH_DAYS, day_of_year
+from utils.result_cache import cached
+
+START_DAYS = np.arange(1, 29)
+END_DAYS = np.arange(1, 32)
+GRID_COLUMNS = ['Month', 'Start Day', 'End Day', 'Avg Return (%)', 'Positive Ratio (%)', 'Negative Ratio (%)', 'Observations']
+
+def _month_grid(day_index, month, sel, chunk):
+    """Sums over (stock, year) of every (start_day, end_day) window return for one month."""
+    d0 = day_of_year(month, START_DAYS)
+    d1 = day_of_year(month, np.minimum(END_DAYS, MONTH_DAYS[month - 1]))
+    n = np.zeros((len(START_DAYS), len(END_DAYS)))
+    total, pos, neg = n.copy(), n.copy(), n.copy()
+    for lo in range(0, len(sel), chunk):
+        codes = sel[lo:lo + chunk]
+        # The filled index already holds the first/last qualifying close for every day, so the
+        # whole grid is an outer ratio of two gathers instead of one scan per (start, end) pair
+        first = day_index.first_idx[codes][:, :, d0]
+        last = day_index.last_idx[codes][:, :, d1]
+        p0 = day_index.price_at(first, day_index.in_month(first, month))
+        p1 = day_index.price_at(last, day_index.in_month(last, month))
+        ret = (p1[:, :, None, :] - p0[:, :, :, None]) / p0[:, :, :, None] * 100
+        ok = ~np.isnan(ret)
+        n += ok.sum(axis=(0, 1))
+        total += np.where(ok, ret, 0).sum(axis=(0, 1))
+        pos += (ret > 0).sum(axis=(0, 1))
+        neg += (ret < 0).sum(axis=(0, 1))
+    return n, total, pos, neg
+
+@cached('window_grid')
+def optimize_windows(day_index, stocks=None, chunk=256):
+    """
+    Stats for every valid (start_day < end_day) monthly window, per month, pooled over the given
+    stocks (all by default) and their years. Long format; see window_matrix for heatmaps.
+    """
+    sel = np.arange(len(day_index.tickers)) if stocks is None else np.array([day_index.code(s) for s in stocks])
+    frames = []
+    for m in range(1, 13):
+        n, total, pos, neg = _month_grid(day_index, m, sel, chunk)
+        sd, ed = np.meshgrid(START_DAYS, END_DAYS, indexing='ij')
+        keep = (sd < ed) & (n > 0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            frames.append(pd.DataFrame({
+                'Month': calendar.month_abbr[m],
+                'Start Day': sd[keep], 'End Day': ed[keep],
+                'Avg Return (%)': (total / n)[keep],
+                'Positive Ratio (%)': (pos / n * 100)[keep],
+                'Negative Ratio (%)': (neg / n * 100)[keep],
+                'Observations': n[keep].astype(int),
+            }))
+    return pd.concat(frames, ignore_index=True).round(2)[GRID_COLUMNS]
+
+def window_matrix(grid, month, value='Avg Return (%)'):
+    """(start day x end day) matrix of one month's grid, NaN where start >= end."""
+    sub = grid[grid['Month'] == month]
+    return sub.pivot(index='Start Day', columns='End Day', values=value).reindex(index=START_DAYS, columns=END_DAYS)
+
+def top_windows(grid, by='Avg Return (%)', k=3):
+    """Best k windows per month by the given column."""
+    order = grid.sort_values(by, ascending=False, kind='stable')
+    top = order.groupby('Month', sort=False).head(k)
+    top = top.assign(_m=top['Month'].map(list(calendar.month_abbr).index))
+    return top.sort_values(['_m', by], ascending=[True, False]).drop(columns='_m').reset_index(drop=True)